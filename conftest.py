@@ -0,0 +1,90 @@
+import os
+from contextlib import contextmanager
+import pytest
+from src.etl.etl_service import ETLService
+from src.etl.memory_backend import InMemoryElasticsearch
+
+# ES_BACKEND=memory (default) runs the suite against InMemoryElasticsearch,
+# ES_BACKEND=elasticsearch against the cluster at ELASTICSEARCH_HOST
+ES_BACKEND = os.environ.get('ES_BACKEND', 'memory')
+DATA_FILE = os.environ.get('ETL_DATA_FILE', '/app/data/Womens_Clothing.csv')
+# Set by pytest-xdist in its worker processes (gw0, gw1, ...)
+XDIST_WORKER = os.environ.get('PYTEST_XDIST_WORKER')
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests that need a real cluster when running in memory"""
+    if ES_BACKEND == 'elasticsearch':
+        return
+    skip = pytest.mark.skip(reason="needs a live cluster (ES_BACKEND=elasticsearch)")
+    for item in items:
+        if "live_es" in item.keywords:
+            item.add_marker(skip)
+
+@contextmanager
+def shared_load_lock(tmp_path_factory):
+    """Serialize data loads of xdist workers sharing one cluster
+
+    Workers have their own basetemp under a common parent, where the lock
+    file lives. Without xdist, or with each worker in memory, nothing is
+    shared and no lock is taken.
+    """
+    if XDIST_WORKER is None or ES_BACKEND != 'elasticsearch':
+        yield
+        return
+    lock_path = tmp_path_factory.getbasetemp().parent / "setup_data.lock"
+    with open(lock_path, 'w') as lock_file:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows: msvcrt gives up after 10 s, a load can take longer
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@pytest.fixture(scope="session")
+def etl_service():
+    """Create ETL service instance on the selected backend
+
+    Session scoped, so every test of a worker goes through the same pooled
+    client.
+    """
+    if ES_BACKEND == 'elasticsearch':
+        return ETLService(es_host=os.environ.get('ELASTICSEARCH_HOST', 'elasticsearch'))
+    return ETLService(client=InMemoryElasticsearch())
+
+@pytest.fixture(scope="session")
+def setup_data(etl_service, tmp_path_factory):
+    """Prepare the backend with proper data and mapping
+
+    The load is skipped when the live index already holds the fingerprint of
+    DATA_FILE, mapping and transform, so repeat runs on a cluster start at once.
+    Under pytest-xdist the first worker to take the lock loads the data; the
+    others wait for it, then find the fingerprint and skip.
+    """
+    try:
+        with shared_load_lock(tmp_path_factory):
+            etl_service.run_etl(DATA_FILE, skip_if_unchanged=True)
+        etl_service.wait_until_ready()
+        return True
+    except Exception as e:
+        raise Exception(f"ETL process failed: {str(e)}")
+
+@pytest.fixture(scope="session")
+def es_client(etl_service, setup_data):
+    """Get the client of the ETL service, once the data is loaded"""
+    return etl_service.es
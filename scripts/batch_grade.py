@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Correction par lot de nombreuses soumissions sur un seul index chargé
+Usage: python scripts/batch_grade.py soumissions/ [--backend memory]
+                                     [--batch-size 200] [--concurrency 4]
+                                     [--output-dir grading/]
+
+Chaque sous-dossier de soumissions/ est un étudiant et contient son
+src/queries/exam_queries.py (ou directement exam_queries.py). Les données
+sont chargées une seule fois, puis les query_list de toutes les soumissions
+sont exécutées ensemble par _msearch de --batch-size requêtes, --concurrency
+à la fois. Les tests de tests/test_elastic_search.py sont ensuite appelés
+avec les réponses de chaque étudiant et notés par ExamReportGenerator: un
+rapport Markdown par étudiant et un summary.json sont écrits dans
+--output-dir. Les tests ETL ne sont pas notés ici, l'index étant commun, ni
+avec --backend memory ceux qui exigent un vrai cluster (significant_text).
+"""
+import argparse
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from scripts.generate_exam_report import ExamReportGenerator
+from src.etl.etl_service import ETLService
+from src.etl.memory_backend import InMemoryElasticsearch
+from src.queries.query_runner import DEFAULT_INDEX, MSearchResults, named_queries, run_msearch
+
+# Emplacements possibles du fichier de requêtes dans une soumission
+SUBMISSION_FILES = ["src/queries/exam_queries.py", "exam_queries.py"]
+TEST_MODULE = "tests.test_elastic_search"
+EXPECTED_RESULTS = "tests/expected_results.json"
+# Secondes accordées à l'import d'une soumission
+IMPORT_TIMEOUT = 30
+
+# Exécuté dans un processus à part: seul le JSON de query_list revient au
+# correcteur, la sortie de la soumission part sur stderr
+LOADER = """
+import json, runpy, sys
+stdout, sys.stdout = sys.stdout, sys.stderr
+query_list = runpy.run_path(sys.argv[1], run_name="submission")["query_list"]
+json.dump(query_list, stdout)
+"""
+
+
+def find_submissions(root):
+    """Retourne {étudiant: chemin de exam_queries.py} pour les sous-dossiers de root"""
+    submissions = {}
+    for student_dir in sorted(Path(root).iterdir()):
+        for relative in SUBMISSION_FILES:
+            path = student_dir / relative
+            if student_dir.is_dir() and path.is_file():
+                submissions[student_dir.name] = path
+                break
+    return submissions
+
+
+def load_queries(path, timeout=IMPORT_TIMEOUT):
+    """Importe query_list depuis path dans un sous-processus, {nom: requête}
+
+    Le code de la soumission ne s'exécute jamais dans le correcteur: il ne
+    peut donc modifier ni les tests, ni le barème, ni le client partagé.
+    """
+    process = subprocess.run([sys.executable, "-c", LOADER, str(path)],
+                             capture_output=True, text=True, timeout=timeout)
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {process.returncode}")
+    return named_queries(json.loads(process.stdout))
+
+
+def run_all(es, queries, index=DEFAULT_INDEX, batch_size=200, concurrency=4):
+    """Exécute {étudiant: {nom: requête}} en _msearch groupés, {étudiant: MSearchResults}
+
+    Les requêtes de plusieurs étudiants partagent un même _msearch; au plus
+    concurrency _msearch sont en vol, chacun limité à autant de recherches
+    simultanées côté cluster.
+    """
+    pending = [(student, name, body) for student, named in queries.items()
+               for name, body in named.items()]
+    batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+
+    def run_batch(batch):
+        searches = {str(position): body for position, (_, _, body) in enumerate(batch)}
+        return run_msearch(es, searches, index=index, max_concurrent_searches=concurrency)
+
+    results = {student: MSearchResults() for student in queries}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for batch, responses in zip(batches, executor.map(run_batch, batches)):
+            for position, (student, name, _) in enumerate(batch):
+                dict.__setitem__(results[student], name, dict.__getitem__(responses, str(position)))
+    return results
+
+
+def collect_tests(live_cluster):
+    """Retourne ([(nom, fonction)] des tests notés, [noms des tests non notables])
+
+    Sans vrai cluster, les tests marqués live_es ne peuvent pas être notés: ils
+    sont écartés du barème plutôt que comptés comme ignorés (demi-points).
+    """
+    module = importlib.import_module(TEST_MODULE)
+    tests, excluded = [], []
+    for name, function in inspect.getmembers(module, inspect.isfunction):
+        if name.startswith("test_") and function.__module__ == module.__name__:
+            marks = {mark.name for mark in getattr(function, "pytestmark", [])}
+            if "live_es" in marks and not live_cluster:
+                excluded.append(name)
+            else:
+                tests.append((name, function))
+    # Ordre du fichier, celui du rapport pytest
+    return sorted(tests, key=lambda test: test[1].__code__.co_firstlineno), sorted(excluded)
+
+
+def grade(student, results, expected, tests, error=None):
+    """Note un étudiant avec ExamReportGenerator à partir de ses réponses"""
+    generator = ExamReportGenerator({"name": student})
+    for name, function in tests:
+        if error is not None:
+            generator.add_result(name, "ERROR", TEST_MODULE, message=error)
+            continue
+        fixtures = {"exam_results": results, "load_expected_results": expected}
+        parameters = inspect.signature(function).parameters
+        start = time.perf_counter()
+        try:
+            function(**{key: value for key, value in fixtures.items() if key in parameters})
+            status, message = "PASSED", ""
+        except Exception as e:
+            status, message = "FAILED", f"{type(e).__name__}: {e}"
+        generator.add_result(name, status, TEST_MODULE, time.perf_counter() - start, message)
+    generator.calculate_score()
+    return generator
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("submissions", help="Dossier contenant un sous-dossier par étudiant")
+    parser.add_argument("--backend", choices=["elasticsearch", "memory"],
+                        default=os.getenv("ES_BACKEND", "elasticsearch"))
+    parser.add_argument("--host", default=os.getenv("ELASTICSEARCH_HOST", "localhost"))
+    parser.add_argument("--data", default=os.getenv("ETL_DATA_FILE", "data/Womens_Clothing.csv"))
+    parser.add_argument("--batch-size", type=int, default=200,
+                        help="Recherches par requête _msearch (défaut: 200)")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="Requêtes _msearch en parallèle (défaut: 4)")
+    parser.add_argument("--output-dir", default="grading")
+    args = parser.parse_args()
+
+    submissions = find_submissions(args.submissions)
+    if not submissions:
+        print(f"❌ Aucune soumission trouvée dans {args.submissions}")
+        return 1
+    print(f"📥 {len(submissions)} soumissions trouvées")
+
+    if args.backend == "memory":
+        etl = ETLService(client=InMemoryElasticsearch())
+    else:
+        etl = ETLService(es_host=args.host)
+    start = time.perf_counter()
+    etl.run_etl(args.data, skip_if_unchanged=True)
+    etl.wait_until_ready()
+    print(f"📦 Données prêtes en {time.perf_counter() - start:.1f} s")
+
+    queries, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        loads = {student: executor.submit(load_queries, path)
+                 for student, path in submissions.items()}
+        for student, load in loads.items():
+            try:
+                queries[student] = load.result()
+            except Exception as e:
+                errors[student] = f"{type(e).__name__}: {e}"
+                print(f"⚠️  {student}: import impossible ({errors[student]})")
+
+    start = time.perf_counter()
+    results = run_all(etl.es, queries, etl.index_name, args.batch_size, args.concurrency)
+    searches = sum(len(named) for named in queries.values())
+    print(f"🔎 {searches} requêtes exécutées en {time.perf_counter() - start:.1f} s")
+
+    with open(EXPECTED_RESULTS, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    tests, excluded = collect_tests(args.backend == "elasticsearch")
+    if excluded:
+        print(f"⚠️  Non notés sans vrai cluster (hors barème): {', '.join(excluded)}")
+    os.makedirs(args.output_dir, exist_ok=True)
+    summary = {}
+    print(f"\n{'étudiant':<30}{'score':>8}{'réussis':>10}")
+    for student in submissions:
+        generator = grade(student, results.get(student), expected, tests, errors.get(student))
+        report_path = os.path.join(args.output_dir, f"{student}.md")
+        generator.generate_markdown_report(report_path)
+        passed = sum(1 for r in generator.test_results.values() if r['status'] == 'PASSED')
+        summary[student] = {"score": generator.exam_score, "passed": passed,
+                            "total": len(generator.test_results), "not_graded": excluded,
+                            "report": report_path}
+        print(f"{student:<30}{generator.exam_score:>7.1f}%{passed:>6}/{len(tests)}")
+
+    summary_path = os.path.join(args.output_dir, "summary.json")
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Rapports et résumé écrits dans {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
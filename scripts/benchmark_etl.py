@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark de débit de l'ETL: lecture, transformation et chargement mesurés séparément
+Usage: python scripts/benchmark_etl.py [--rows 1000000] [--data fichier.csv]
+                                       [--threads 4] [--index nom] [--overwrite]
+                                       [--output bench.json]
+
+Sans --data, un jeu synthétique de --rows lignes est généré dans un
+répertoire temporaire. Chaque étape rapporte sa durée, son débit en
+lignes/s et le pic de mémoire résidente (RSS) du processus atteint à la
+fin de l'étape. Le chargement vise un index jetable (eval_bench_<horodatage>
+par défaut), supprimé à la fin, sur l'ElasticSearch de ELASTICSEARCH_HOST.
+Un --index qui existe déjà (index ou alias) est refusé sauf avec --overwrite,
+car il est écrasé puis supprimé.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from scripts.generate_synthetic_data import write_synthetic_data
+from src.etl.etl_service import DEFAULT_CHUNK_SIZE, ETLService
+
+
+def peak_rss_mb():
+    """Pic de mémoire résidente du processus depuis son démarrage, en Mo"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets sous Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(label, rows, function, *args, **kwargs):
+    """Exécute une étape et retourne (résultat, mesures); rows=None compte les lignes du résultat"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - start
+    rows = len(result) if rows is None else rows
+    stats = {"seconds": seconds, "rows_per_second": rows / seconds if seconds else 0.0,
+             "peak_rss_mb": peak_rss_mb()}
+    print(f"{label:<12}{seconds:>9.2f}s{stats['rows_per_second']:>14,.0f} lignes/s"
+          f"{stats['peak_rss_mb']:>10.0f} Mo")
+    return result, stats
+
+
+def run_benchmark(etl, path, chunk_size, threads):
+    """Mesure les trois étapes de l'ETL sur path"""
+    print(f"{'étape':<12}{'durée':>10}{'débit':>23}{'pic RSS':>11}")
+    raw, read_stats = measure("lecture", None, etl.read_data, path)
+    rows = len(raw)
+    df, transform_stats = measure("transform", rows, etl.transform_data, raw)
+    del raw
+
+    etl.create_index()
+    try:
+        _, load_stats = measure("chargement", len(df), etl.load_data, df,
+                                chunk_size=chunk_size, thread_count=threads)
+        load_stats["indexed"] = etl.es.count(index=etl.index_name)["count"]
+    finally:
+        etl.es.indices.delete(index=etl.index_name, ignore_unavailable=True)
+    return {"rows": rows, "read": read_stats, "transform": transform_stats, "load": load_stats}
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--data", help="Fichier source existant au lieu de données synthétiques")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--index", help="Index jetable (eval_bench_<horodatage> par défaut)")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Accepte d'écraser puis supprimer un --index existant")
+    parser.add_argument("--output", help="Fichier JSON pour les résultats")
+    args = parser.parse_args()
+
+    etl = ETLService(es_host=os.getenv("ELASTICSEARCH_HOST", "localhost"))
+    etl.index_name = args.index or f"eval_bench_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    exists = (etl.es.indices.exists(index=etl.index_name)
+              or etl.es.indices.exists_alias(name=etl.index_name))
+    if exists and not args.overwrite:
+        print(f"❌ L'index {etl.index_name} existe déjà: relancez avec --overwrite pour "
+              f"l'écraser puis le supprimer")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.data
+        if path is None:
+            path = os.path.join(tmp, "reviews.csv")
+            print(f"📝 Génération de {args.rows} lignes synthétiques...")
+            write_synthetic_data(path, args.rows, args.seed)
+
+        results = run_benchmark(etl, path, args.chunk_size, args.threads)
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "data": args.data or f"synthetic:{args.rows}:{args.seed}",
+            "chunk_size": args.chunk_size,
+            "threads": args.threads,
+            "index": etl.index_name,
+            **results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark des requêtes d'examen: latence serveur ('took') vs latence de bout en bout
+Usage: python scripts/benchmark_queries.py [--runs 50] [--warmup 5] [--clear-cache]
+                                           [--output bench.json] [--baseline ancien.json]
+
+Chaque requête de query_list est exécutée --warmup fois sans mesure, puis
+--runs fois. Le script rapporte p50/p95/p99 du 'took' d'ElasticSearch et du
+temps mesuré côté client; l'écart entre les deux correspond au réseau, à la
+sérialisation et au client. Avec --clear-cache, le request cache de l'index
+est vidé avant chaque exécution pour mesurer des requêtes à froid.
+Avec --baseline, le p95 du 'took' est comparé à un fichier JSON d'une
+exécution précédente et le script échoue si une requête a régressé.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from elasticsearch import Elasticsearch
+
+from src.queries.query_runner import DEFAULT_INDEX, named_queries
+
+PERCENTILES = [50, 95, 99]
+
+
+def summarize(samples):
+    """Retourne min/moyenne/percentiles/max d'une série de mesures en ms"""
+    values = np.asarray(samples, dtype=float)
+    summary = {"min": float(values.min()), "mean": float(values.mean()),
+               "max": float(values.max())}
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}"] = float(np.percentile(values, percentile))
+    return summary
+
+
+def benchmark_query(es, index, body, runs, warmup, clear_cache):
+    """Exécute une requête warmup + runs fois et retourne les mesures brutes"""
+    def run_once():
+        if clear_cache:
+            es.indices.clear_cache(index=index, request=True)
+        start = time.perf_counter()
+        result = es.search(index=index, body=body)
+        return result["took"], (time.perf_counter() - start) * 1000
+
+    for _ in range(warmup):
+        run_once()
+    took, wall = zip(*(run_once() for _ in range(runs)))
+    return {"took_ms": list(took), "wall_ms": list(wall)}
+
+
+def regressions(results, baseline, tolerance, min_delta_ms=1.0):
+    """Retourne les requêtes dont le p95 du took dépasse celui de baseline
+
+    Un écart de moins de min_delta_ms est ignoré: 'took' est en millisecondes
+    entières, donc 1 -> 2 ms n'est pas une régression de 100%.
+    """
+    regressed = {}
+    for name, result in results.items():
+        before = baseline.get("queries", {}).get(name, {}).get("took_ms", {}).get("p95")
+        if before is None:
+            continue
+        after = result["took_ms"]["p95"]
+        if after - before > min_delta_ms and after > before * (1 + tolerance):
+            regressed[name] = (before, after)
+    return regressed
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("ELASTICSEARCH_HOST", "localhost"))
+    parser.add_argument("--index", default=DEFAULT_INDEX)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Vide le request cache avant chaque exécution")
+    parser.add_argument("--query", action="append",
+                        help="Ne mesure que cette requête (ex: q2_1), répétable")
+    parser.add_argument("--output", help="Fichier JSON pour les résultats")
+    parser.add_argument("--baseline", help="Fichier JSON d'une exécution précédente")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Hausse relative du p95 tolérée avant régression (défaut: 0.2)")
+    args = parser.parse_args()
+
+    es = Elasticsearch(f"http://{args.host}:9200")
+    if not es.ping():
+        print(f"❌ ElasticSearch non accessible sur {args.host}:9200")
+        return 1
+
+    queries = {name: body for name, body in named_queries().items()
+               if body and (not args.query or name in args.query)}
+    print(f"⏱️  {len(queries)} requêtes, {args.warmup} warmup + {args.runs} mesures chacune"
+          f"{' (cache vidé)' if args.clear_cache else ''}")
+
+    results = {}
+    print(f"\n{'requête':<8}{'took p50':>10}{'p95':>8}{'p99':>8}"
+          f"{'total p50':>12}{'p95':>8}{'p99':>8}")
+    for name, body in queries.items():
+        samples = benchmark_query(es, args.index, body, args.runs, args.warmup, args.clear_cache)
+        took, wall = summarize(samples["took_ms"]), summarize(samples["wall_ms"])
+        results[name] = {"took_ms": took, "wall_ms": wall, "samples": samples}
+        print(f"{name:<8}{took['p50']:>10.1f}{took['p95']:>8.1f}{took['p99']:>8.1f}"
+              f"{wall['p50']:>12.1f}{wall['p95']:>8.1f}{wall['p99']:>8.1f}")
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "elasticsearch": es.info()["version"]["number"],
+            "python": platform.python_version(),
+            "index": args.index,
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "clear_cache": args.clear_cache,
+            "queries": results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressed = regressions(results, baseline, args.tolerance)
+        for name, (before, after) in regressed.items():
+            print(f"❌ {name}: took p95 {before:.1f} -> {after:.1f} ms")
+        if regressed:
+            return 1
+        print(f"\n✅ Aucune régression par rapport à {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Benchmark du transform ETL: implémentation d'origine vs chemin typé/vectorisé
+Usage: python scripts/benchmark_transform.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from scripts.generate_synthetic_data import write_synthetic_data
+from src.etl.etl_service import READ_DTYPES, _legacy_transform as legacy_transform, transform_frame
+
+
+def timed(function, *args, **kwargs):
+    """Retourne (résultat, secondes)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "reviews.csv")
+        print(f"📝 Génération de {args.rows} lignes synthétiques...")
+        write_synthetic_data(path, args.rows)
+
+        raw, legacy_read = timed(pd.read_csv, path)
+        legacy, legacy_transform_time = timed(legacy_transform, raw)
+        del raw
+
+        typed, typed_read = timed(pd.read_csv, path, dtype=READ_DTYPES)
+        fast, fast_transform_time = timed(transform_frame, typed)
+
+    pd.testing.assert_frame_equal(legacy, fast)
+    print("✅ Résultats identiques")
+    print(f"{'':<12}{'lecture':>10}{'transform':>12}{'total':>10}")
+    for label, read_time, transform_time in [
+        ("origine", legacy_read, legacy_transform_time),
+        ("typé", typed_read, fast_transform_time),
+    ]:
+        print(f"{label:<12}{read_time:>9.2f}s{transform_time:>11.2f}s"
+              f"{read_time + transform_time:>9.2f}s")
+    print(f"⚡ Transform: x{legacy_transform_time / fast_transform_time:.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
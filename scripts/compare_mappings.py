@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Compare le mapping optimisé de l'ETL au mapping dynamique d'ElasticSearch
+Usage: python scripts/compare_mappings.py [--data data/Womens_Clothing.csv] [--runs 20]
+
+Les mêmes données sont chargées dans deux index temporaires, fusionnés en un
+segment, puis le script rapporte la taille sur disque, la mémoire des segments
+et la latence des agrégations terms utilisées par les requêtes d'examen.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+from src.etl.etl_service import ETLService
+
+# Champs agrégés par les requêtes d'examen
+AGGREGATED_FIELDS = ['Division Name', 'Department Name', 'Class Name']
+
+
+def aggregation_queries(keyword_suffix):
+    """Requêtes terms + stats sur les catégories, pour un suffixe de champ donné"""
+    return {
+        field: {
+            "size": 0,
+            "aggs": {
+                "by_value": {
+                    "terms": {"field": f"{field}{keyword_suffix}", "size": 50},
+                    "aggs": {"rating": {"stats": {"field": "Rating"}}}
+                }
+            }
+        }
+        for field in AGGREGATED_FIELDS
+    }
+
+
+def measure(es, index, queries, runs):
+    """Mesure taille, mémoire et latence médiane ('took') par requête"""
+    stats = es.indices.stats(index=index, metric="store,segments")["indices"][index]["primaries"]
+    latencies = {}
+    for name, body in queries.items():
+        took = []
+        for _ in range(runs):
+            result = es.search(index=index, body=body, request_cache=False)
+            took.append(result["took"])
+        latencies[name] = statistics.median(took)
+    return {
+        "store_bytes": stats["store"]["size_in_bytes"],
+        "segments_memory_bytes": stats["segments"]["memory_in_bytes"],
+        "median_took_ms": latencies,
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="data/Womens_Clothing.csv")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--output", help="Fichier JSON pour les résultats bruts")
+    args = parser.parse_args()
+
+    etl = ETLService(es_host=os.getenv("ELASTICSEARCH_HOST", "localhost"))
+    es = etl.es
+    df = etl.transform_data(etl.read_data(args.data))
+    settings = {key: etl.get_index_mapping()["settings"][key]
+                for key in ("number_of_shards", "number_of_replicas")}
+
+    variants = {
+        # Le mapping dynamique crée text + sous-champ .keyword pour chaque chaîne
+        "dynamique": (f"{etl.index_name}_mapping_dynamic", {"settings": settings}, ".keyword"),
+        "optimisé": (f"{etl.index_name}_mapping_tuned", etl.get_index_mapping(), ""),
+    }
+    results = {}
+    try:
+        for label, (index, body, keyword_suffix) in variants.items():
+            es.indices.delete(index=index, ignore_unavailable=True)
+            es.indices.create(index=index, body=body)
+            print(f"📥 Chargement de {len(df)} documents dans {index}...")
+            etl.load_data(df, index=index)
+            es.indices.forcemerge(index=index, max_num_segments=1, request_timeout=600)
+            es.indices.refresh(index=index)
+            results[label] = measure(es, index, aggregation_queries(keyword_suffix), args.runs)
+    finally:
+        for index, _, _ in variants.values():
+            es.indices.delete(index=index, ignore_unavailable=True)
+
+    dynamic, tuned = results["dynamique"], results["optimisé"]
+    print("\n| Mesure | Dynamique | Optimisé | Gain |")
+    print("|--------|-----------|----------|------|")
+    for key, label in [("store_bytes", "Taille disque (Mo)"),
+                       ("segments_memory_bytes", "Mémoire segments (Ko)")]:
+        scale = 1024 * 1024 if key == "store_bytes" else 1024
+        print(f"| {label} | {dynamic[key] / scale:.1f} | {tuned[key] / scale:.1f} | "
+              f"{(1 - tuned[key] / dynamic[key]) * 100:.0f}% |")
+    for field in AGGREGATED_FIELDS:
+        before = dynamic["median_took_ms"][field]
+        after = tuned["median_took_ms"][field]
+        print(f"| terms {field} (ms, médiane) | {before} | {after} | "
+              f"{(1 - after / before) * 100 if before else 0:.0f}% |")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,11 +10,11 @@ from pathlib import Path
 import xml.etree.ElementTree as ET
 
 class ExamReportGenerator:
-    def __init__(self):
+    def __init__(self, student_info=None):
         self.test_results = {}
         self.exam_score = 0
         self.total_points = 0
-        self.student_info = self._get_student_info()
+        self.student_info = {**self._get_student_info(), **(student_info or {})}
         
     def _get_student_info(self):
         """Récupère les informations de l'étudiant depuis la PR"""
@@ -59,16 +59,20 @@ class ExamReportGenerator:
                     status = 'SKIPPED'
                     message = skipped.get('message', '')
                 
-                self.test_results[test_name] = {
-                    'status': status,
-                    'class': class_name,
-                    'time': time_taken,
-                    'message': message,
-                    'points': self._calculate_points(test_name, status)
-                }
+                self.add_result(test_name, status, class_name, time_taken, message)
                 
         except Exception as e:
             print(f"Erreur lors du parsing des résultats: {e}")
+
+    def add_result(self, test_name, status, class_name='', time_taken=0.0, message=''):
+        """Enregistre le résultat d'un test (PASSED, FAILED, ERROR ou SKIPPED)"""
+        self.test_results[test_name] = {
+            'status': status,
+            'class': class_name,
+            'time': time_taken,
+            'message': message,
+            'points': self._calculate_points(test_name, status)
+        }
     
     def _calculate_points(self, test_name, status):
         """Calcule les points pour un test donné"""
@@ -112,7 +116,7 @@ class ExamReportGenerator:
         self.exam_score = (earned_points / self.total_points * 100) if self.total_points > 0 else 0
         return self.exam_score
     
-    def generate_markdown_report(self):
+    def generate_markdown_report(self, output_path='exam-report.md'):
         """Génère un rapport Markdown pour les commentaires PR"""
         passed_tests = sum(1 for r in self.test_results.values() if r['status'] == 'PASSED')
         failed_tests = sum(1 for r in self.test_results.values() if r['status'] == 'FAILED')
@@ -183,8 +187,9 @@ Votre examen nécessite des corrections. Tests à revoir :
 - Testez vos requêtes localement avec `python scripts/validate_queries.py`
 """
         
-        with open('exam-report.md', 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8') as f:
             f.write(markdown_content)
+        return markdown_content
     
     def _get_max_points(self, test_name):
         """Retourne le nombre maximum de points pour un test"""
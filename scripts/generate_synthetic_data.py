@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Génère des avis synthétiques au format de Womens_Clothing.csv, à n'importe quelle échelle
+Usage: python scripts/generate_synthetic_data.py --rows 1000000 [--output data/synthetic.csv]
+                                                 [--seed 42]
+
+Les distributions (notes, âges, catégories, longueur des avis, taux de
+valeurs manquantes, typo 'Initmates') reprennent celles du jeu de données
+réel. Une sortie en .parquet est écrite en Parquet, sinon en CSV.
+Les lignes sont écrites par blocs, la mémoire reste donc bornée
+même pour 10M de lignes. À graine égale, le fichier produit est identique.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Lignes générées et écrites à la fois
+BLOCK_ROWS = 250_000
+
+RATINGS = ([1, 2, 3, 4, 5], [0.036, 0.067, 0.122, 0.216, 0.559])
+
+# Division brute telle qu'elle apparaît dans le CSV source, typo comprise
+DIVISIONS = (["General", "General Petite", "Initmates"], [0.59, 0.35, 0.06])
+
+# Département -> (poids, classes)
+DEPARTMENTS = {
+    "Tops": (0.446, ["Knits", "Blouses", "Sweaters", "Fine gauge"]),
+    "Dresses": (0.27, ["Dresses"]),
+    "Bottoms": (0.163, ["Pants", "Jeans", "Skirts", "Shorts"]),
+    "Intimate": (0.074, ["Lounge", "Swim", "Sleep", "Intimates", "Legwear", "Layering"]),
+    "Jackets": (0.044, ["Jackets", "Outerwear"]),
+    "Trend": (0.003, ["Trend"]),
+}
+
+# Fraction de valeurs manquantes par colonne
+NULL_RATES = {
+    "Title": 0.162,
+    "Review Text": 0.036,
+    "Division Name": 0.0006,
+    "Department Name": 0.0006,
+    "Class Name": 0.0006,
+}
+
+TITLES = ["Love it!", "Beautiful", "Perfect", "Cute top", "Great dress", "Runs small",
+          "Runs large", "Disappointed", "So comfortable", "Not for me", "Gorgeous",
+          "Wanted to love it", "Great fit", "Returned", "Soft and cozy", " Love this dress "]
+
+POSITIVE_WORDS = ["love", "perfect", "beautiful", "comfortable", "soft", "flattering",
+                  "gorgeous", "great", "compliments", "cute", "recommend", "happy"]
+NEGATIVE_WORDS = ["small", "large", "returned", "disappointed", "cheap", "thin",
+                  "unflattering", "itchy", "boxy", "poor", "short", "sheer"]
+COMMON_WORDS = ["the", "dress", "top", "fit", "fabric", "color", "size", "wear", "it",
+                "and", "is", "was", "i", "this", "material", "length", "ordered", "petite",
+                "waist", "with", "jeans", "summer", "store", "online", "usual", "xs"]
+
+# Avis distincts générés par bloc; les lignes y piochent
+REVIEW_POOL = 20_000
+
+
+def _review_pool(rng, size):
+    """Construit des avis plausibles: ~60 mots en moyenne, tronqués à 500 caractères"""
+    lengths = np.clip(rng.normal(60, 28, size).astype(int), 3, 115)
+    positive = rng.random(size) < 0.8
+    reviews = []
+    for length, is_positive in zip(lengths, positive):
+        flavour = POSITIVE_WORDS if is_positive else NEGATIVE_WORDS
+        words = rng.choice(COMMON_WORDS, length).astype(object)
+        # Environ un mot sur cinq porte l'opinion de l'avis
+        mask = rng.random(length) < 0.2
+        words[mask] = rng.choice(flavour, mask.sum())
+        text = " ".join(words)
+        if len(text) > 499:
+            text = text[:499].rsplit(" ", 1)[0]
+        reviews.append(text[0].upper() + text[1:] + ".")
+    return np.array(reviews, dtype=object)
+
+
+def generate_reviews(rows, seed=42, start=0):
+    """Retourne un DataFrame de rows avis synthétiques; start décale l'index"""
+    rng = np.random.default_rng([seed, start])
+    departments = list(DEPARTMENTS)
+    weights = np.array([DEPARTMENTS[d][0] for d in departments])
+    department_idx = rng.choice(len(departments), rows, p=weights / weights.sum())
+    classes = np.empty(rows, dtype=object)
+    for i, department in enumerate(departments):
+        selected = department_idx == i
+        classes[selected] = rng.choice(DEPARTMENTS[department][1], selected.sum())
+
+    ratings = rng.choice(RATINGS[0], rows, p=RATINGS[1])
+    # Recommandé surtout pour les bonnes notes, comme dans les données réelles
+    recommended = (rng.random(rows) < np.array([0.0, 0.05, 0.0, 0.4, 0.92, 0.99])[ratings])
+
+    df = pd.DataFrame({
+        'Clothing ID': rng.zipf(1.6, rows) % 1206,
+        'Age': np.clip(rng.normal(43, 12.3, rows), 18, 99).astype(int),
+        'Title': rng.choice(TITLES, rows).astype(object),
+        'Review Text': rng.choice(_review_pool(rng, min(rows, REVIEW_POOL)), rows),
+        'Rating': ratings,
+        'Recommended IND': recommended.astype(int),
+        'Positive Feedback Count': np.minimum(rng.geometric(0.3, rows) - 1, 122),
+        'Division Name': rng.choice(DIVISIONS[0], rows, p=DIVISIONS[1]).astype(object),
+        'Department Name': np.array(departments, dtype=object)[department_idx],
+        'Class Name': classes,
+    }, index=pd.RangeIndex(start, start + rows))
+    for column, rate in NULL_RATES.items():
+        df.loc[rng.random(rows) < rate, column] = np.nan
+    return df
+
+
+def write_synthetic_data(path, rows, seed=42, block_rows=BLOCK_ROWS):
+    """Écrit rows avis synthétiques dans path (CSV, ou Parquet selon l'extension)"""
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for start in range(0, rows, block_rows):
+                block = generate_reviews(min(block_rows, rows - start), seed, start)
+                table = pa.Table.from_pandas(block.reset_index(drop=True), preserve_index=False)
+                writer = writer or pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    for start in range(0, rows, block_rows):
+        block = generate_reviews(min(block_rows, rows - start), seed, start)
+        block.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--output", default="data/synthetic.csv")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    print(f"📝 Génération de {args.rows} avis dans {args.output}...")
+    write_synthetic_data(args.output, args.rows, args.seed)
+    size = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✅ {size:.1f} Mo écrits en {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
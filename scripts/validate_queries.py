@@ -7,6 +7,7 @@ import json
 import sys
 from elasticsearch import Elasticsearch
 from src.queries.exam_queries import query_list
+from src.queries.query_runner import QUERY_NAMES, run_msearch
 
 def validate_query_syntax():
     """Valide la syntaxe JSON de toutes les requêtes"""
@@ -53,28 +54,28 @@ def test_query_execution():
         # Vérifie que l'index existe
         if not es.indices.exists(index='eval_new'):
             print("❌ Index 'eval_new' non trouvé")
-            print("💡 Lancez: python src/etl/etl_service.py")
+            print("💡 Lancez: python -m src.etl.etl_service")
             return False
             
-        query_names = ['q2_1', 'q2_2', 'q2_3', 'q2_4', 'q2_5', 'q2_6',
-                      'q3', 'q4_1', 'q4_2', 'q4_3', 'q4_4',
-                      'q5_1', 'q5_2', 'q5_3', 'q5_4']
-        
-        success_count = 0
-        
+        # Toutes les requêtes non vides partent en un seul aller-retour _msearch
+        queries = {}
         for i, query in enumerate(query_list):
-            query_name = query_names[i] if i < len(query_names) else f"query_{i}"
-            
-            try:
-                if query and query != {}:
-                    result = es.search(index='eval_new', body=query, timeout='30s')
-                    print(f"✅ {query_name}: Exécution OK ({result['took']}ms)")
-                    success_count += 1
-                else:
-                    print(f"⏭️ {query_name}: Requête vide - ignorée")
-                    
-            except Exception as e:
-                print(f"❌ {query_name}: Erreur exécution - {e}")
+            query_name = QUERY_NAMES[i] if i < len(QUERY_NAMES) else f"query_{i}"
+            if query and query != {}:
+                queries[query_name] = query
+            else:
+                print(f"⏭️ {query_name}: Requête vide - ignorée")
+
+        results = run_msearch(es, queries, index='eval_new', max_concurrent_searches=5,
+                              timeout='30s')
+        success_count = 0
+
+        for query_name, result in results.items():
+            if "error" in result:
+                print(f"❌ {query_name}: Erreur exécution - {result['error']}")
+            else:
+                print(f"✅ {query_name}: Exécution OK ({result['took']}ms)")
+                success_count += 1
         
         print(f"\n📊 Résultat: {success_count}/{len([q for q in query_list if q and q != {}])} requêtes réussies")
         return success_count > 0
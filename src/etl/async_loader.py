@@ -0,0 +1,96 @@
+"""
+Asyncio bulk loader for ETLService, built on AsyncElasticsearch
+
+Requires the async extra of the client: pip install "elasticsearch[async]==7.15.0"
+"""
+import asyncio
+import logging
+import time
+
+from elasticsearch import AsyncElasticsearch
+from elasticsearch.exceptions import ConnectionError as ESConnectionError, TransportError
+
+from src.etl.etl_service import DEFAULT_CHUNK_SIZE, AdaptiveBatcher, BatchRetry, ETLSerializer
+
+logger = logging.getLogger(__name__)
+
+# Bulk requests in flight at once
+DEFAULT_CONCURRENCY = 4
+
+
+class AsyncBulkLoader:
+    """Index ETLService data from an event loop
+
+    Actions, encoding and batching are those of the wrapped ETLService, so
+    documents are identical to a synchronous load; concurrency workers share
+    the batch stream and each keeps one bulk request in flight.
+    """
+
+    def __init__(self, service, client=None, concurrency=DEFAULT_CONCURRENCY):
+        self.service = service
+        self.concurrency = concurrency
+        self._owns_client = client is None
+        self.es = client or AsyncElasticsearch(
+            service._hosts(),
+            serializer=ETLSerializer(),
+            maxsize=service.pool_size,
+            http_compress=service.http_compress,
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the client if this loader created it"""
+        if self._owns_client:
+            await self.es.close()
+
+    async def _send_batch(self, batch):
+        """Index one batch of encoded actions, retrying rejected items with backoff
+
+        Same retry policy as ETLService._send_batch (see BatchRetry), sleeping
+        without blocking the event loop.
+        """
+        attempt = BatchRetry(self.service, batch)
+        while attempt.pending:
+            try:
+                delay = attempt.completed(await self.es.bulk(body=attempt.body()))
+            except (ESConnectionError, TransportError) as e:
+                delay = attempt.failed(e)
+            if delay:
+                await asyncio.sleep(delay)
+        return attempt.result()
+
+    async def load_actions(self, actions, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Send bulk actions with concurrency requests in flight, return the number indexed"""
+        batcher = AdaptiveBatcher(initial_docs=chunk_size)
+        batches = batcher.batches(self.service._encode_action(action) for action in actions)
+        indexed = 0
+
+        async def worker():
+            nonlocal indexed
+            # Pulling the next batch never awaits, so workers never interleave inside it
+            for batch in batches:
+                result = await self._send_batch(batch)
+                batcher.record(result)
+                self.service.metrics.record_batch(result)
+                indexed += result.docs
+                logger.info(f"Indexed {result.docs} documents in {result.seconds * 1000:.0f} ms")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        elapsed = time.perf_counter() - start
+        logger.info(f"Async bulk indexing: {indexed} documents in {elapsed:.2f} s "
+                    f"({indexed / elapsed if elapsed else 0:.0f} docs/s)")
+        return indexed
+
+    async def load_data(self, df, chunk_size=DEFAULT_CHUNK_SIZE, index=None):
+        """Async counterpart of ETLService.load_data"""
+        index = index or self.service.index_name
+        indexed = await self.load_actions(self.service.generate_actions(df, index), chunk_size)
+        await self.es.indices.refresh(index=index)
+        logger.info(f"Data loading completed: {indexed} documents")
+        return indexed
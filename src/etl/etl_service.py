@@ -4,197 +4,1376 @@ ETL Service for loading and transforming data into Elasticsearch
 import pandas as pd
 from elasticsearch import Elasticsearch
 import os
+import json
+import hashlib
 import logging
+import math
 import time
+import random
 import numpy as np
-import socket
+from datetime import datetime
+import re
+import multiprocessing
+import cProfile
+import io
+import pstats
+from collections import deque, namedtuple
+from itertools import chain
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from elasticsearch import helpers
+from elasticsearch.exceptions import (
+    ConnectionError as ESConnectionError, SerializationError, TransportError
+)
+from elasticsearch.serializer import JSONSerializer
+
+from src.etl.metrics import ETLMetrics
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib json encoder is used instead
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Number of documents sent per bulk request, and rows per CSV chunk in streaming mode
+DEFAULT_CHUNK_SIZE = 1000
+# Batches waiting for a free worker in parallel mode, on top of those in flight
+DEFAULT_QUEUE_SIZE = 4
+# Rows per partition handed to each transform process
+DEFAULT_PARTITION_SIZE = 50000
+# HTTP connections kept alive per node, enough for a parallel bulk load plus queries
+DEFAULT_POOL_SIZE = 16
+# How long to wait for Elasticsearch at startup, and the cap on one backoff step
+CONNECT_TIMEOUT = 60
+MAX_CONNECT_BACKOFF = 5
+
+# Upper bound on one bulk request body, well under the 100mb http.max_content_length
+DEFAULT_MAX_BATCH_BYTES = 10 * 1024 * 1024
+# HTTP statuses worth retrying: rejected (429) or temporarily unavailable
+RETRY_STATUSES = {429, 502, 503, 504}
+MAX_RETRIES = 5
+INITIAL_BACKOFF = 0.5
+MAX_BACKOFF = 30
+
+# Index settings applied while loading: no periodic refresh, no replicas to
+# copy every write to, translog fsync in the background instead of per request
+BULK_INGEST_SETTINGS = {
+    "refresh_interval": "-1",
+    "number_of_replicas": 0,
+    "translog.durability": "async",
+}
+# Force-merging a large index can take minutes, far beyond the default client timeout
+FORCE_MERGE_TIMEOUT = 1800
+
+# Functions listed in the log when a run is profiled
+PROFILE_TOP = 25
+
+# Incremental mode remembers one content hash per document id in a JSON manifest
+MANIFEST_SUFFIX = ".manifest.json"
+
+# Bump whenever transform_frame changes what gets indexed, so the data
+# fingerprint of existing indices stops matching and they get reloaded
+TRANSFORM_VERSION = 1
+# Bytes read at a time when hashing a source file
+HASH_BLOCK_SIZE = 1 << 20
+
+# Versioned indices kept after an alias swap, the live one included
+KEEP_VERSIONS = 2
+
+# The ten fields that are mapped and indexed; other source columns are never read
+MAPPED_FIELDS = [
+    'Clothing ID', 'Age', 'Title', 'Review Text', 'Rating', 'Recommended IND',
+    'Positive Feedback Count', 'Division Name', 'Department Name', 'Class Name',
+]
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+FEATHER_EXTENSIONS = ('.feather', '.arrow')
+
+# Categoricals are parsed once per distinct value instead of once per row
+CATEGORICAL_DTYPES = {
+    'Division Name': 'category',
+    'Department Name': 'category',
+    'Class Name': 'category',
+}
+# Numeric columns are parsed straight to float64, which holds missing values and
+# is parsed in C; pandas' nullable Int64 parses about twice as slowly
+READ_DTYPES = {
+    **CATEGORICAL_DTYPES,
+    'Clothing ID': 'float64',
+    'Age': 'float64',
+    'Rating': 'float64',
+    'Recommended IND': 'float64',
+    'Positive Feedback Count': 'float64',
+}
+DIVISION_TYPOS = {'Initmates': 'Intimates', 'initmates': 'Intimates'}
+
+# Summary documents written to the companion rollup index, by kind and grouping keys
+ROLLUP_SUFFIX = "_rollup"
+ROLLUP_LEVELS = {
+    "product": ['Clothing ID'],
+    "class": ['Class Name'],
+    "department": ['Division Name', 'Department Name'],
+}
+
+# failed_ids: _id of every item that could not be written (None for generated ids)
+BatchResult = namedtuple("BatchResult", "docs nbytes seconds retries rejected failed failed_ids",
+                         defaults=((),))
+
+
+class AdaptiveBatcher:
+    """Cut encoded bulk actions into requests capped by document count and bytes
+
+    The document cap moves between min_docs and max_docs: it halves when
+    Elasticsearch rejects items, shrinks when a request is slower than
+    target_latency and grows again when requests come back quickly.
+    """
+
+    def __init__(self, initial_docs=DEFAULT_CHUNK_SIZE, min_docs=100, max_docs=None,
+                 max_bytes=DEFAULT_MAX_BATCH_BYTES, target_latency=1.0):
+        self.max_docs = max_docs or initial_docs * 10
+        self.min_docs = min(min_docs, initial_docs)
+        self.batch_docs = initial_docs
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+
+    def batches(self, encoded_actions):
+        """Group (payload, nbytes) pairs into lists within the current caps"""
+        batch, batch_bytes = [], 0
+        for payload, nbytes in encoded_actions:
+            if batch and (len(batch) >= self.batch_docs or batch_bytes + nbytes > self.max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(payload)
+            batch_bytes += nbytes
+        if batch:
+            yield batch
+
+    def record(self, result):
+        """Resize the document cap from the outcome of one bulk request"""
+        if result.rejected:
+            self.batch_docs = max(self.min_docs, self.batch_docs // 2)
+        elif result.seconds > self.target_latency:
+            self.batch_docs = max(self.min_docs, int(self.batch_docs * 0.75))
+        elif result.seconds < self.target_latency / 2 and result.docs >= self.batch_docs:
+            self.batch_docs = min(self.max_docs, int(self.batch_docs * 1.25))
+
+
+class BatchRetry:
+    """Retry policy of one bulk batch, shared by the sync and async loaders
+
+    While pending, the caller sends body() as a bulk request, hands the
+    response to completed() or the client error to failed(), and waits for
+    the delay they return before the next attempt; result() then sums it up.
+    Only items rejected with a RETRY_STATUSES status are sent again. After a
+    connection error the request may or may not have been applied, so the
+    batch is only resent when every action carries an _id: otherwise its
+    documents would be indexed twice under generated ids.
+    """
+
+    def __init__(self, service, batch):
+        self.service = service
+        self.batch = batch
+        self.docs = len(batch)
+        self.nbytes = sum(len(payload.encode("utf-8")) for payload in batch)
+        self.start = time.perf_counter()
+        self.retries = self.rejected = 0
+        self.failed_ids = []
+
+    @property
+    def pending(self):
+        return bool(self.batch)
+
+    def body(self):
+        return "".join(self.batch)
+
+    def failed(self, error):
+        """Return the delay before resending the whole batch, re-raise error if final"""
+        if isinstance(error, ESConnectionError):
+            retryable = all(self.service._payload_id(payload) is not None
+                            for payload in self.batch)
+        else:
+            retryable = error.status_code in RETRY_STATUSES
+        if not retryable or self.retries >= MAX_RETRIES:
+            raise error
+        self.rejected += len(self.batch)
+        return self._retry(f"Bulk request failed ({error}), retrying {len(self.batch)} documents")
+
+    def completed(self, response):
+        """Keep the items response rejected for a retry, return the delay before it"""
+        retry, failed_ids = self.service._split_bulk_response(self.batch, response)
+        self.failed_ids.extend(failed_ids)
+        if retry and self.retries >= MAX_RETRIES:
+            self.failed_ids.extend(self.service._payload_id(payload) for payload in retry)
+            logger.error(f"Giving up on {len(retry)} documents after {self.retries} retries")
+            retry = []
+        self.batch = retry
+        if not retry:
+            return 0
+        self.rejected += len(retry)
+        return self._retry(f"{len(retry)} documents rejected, retrying")
+
+    def _retry(self, message):
+        self.retries += 1
+        delay = self.service._backoff_delay(self.retries)
+        logger.warning(f"{message} in {delay:.1f} s")
+        return delay
+
+    def result(self):
+        failed = len(self.failed_ids)
+        return BatchResult(self.docs - failed, self.nbytes, time.perf_counter() - self.start,
+                           self.retries, self.rejected, failed, tuple(self.failed_ids))
+
+
+def _finite(data):
+    """Copy of data with NaN and infinite floats replaced by None"""
+    if isinstance(data, dict):
+        return {key: _finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple, np.ndarray, pd.Series)):
+        return [_finite(value) for value in data]
+    if isinstance(data, (float, np.floating)) and not math.isfinite(data):
+        return None
+    return data
+
+
+class ETLSerializer(JSONSerializer):
+    """JSON serializer for the ETL client
+
+    numpy scalars and arrays are converted natively, and orjson does the
+    encoding when it is installed. Either way the output is the same: NaN,
+    infinity and NaT are written as null.
+    """
+
+    def default(self, data):
+        if data is pd.NaT:
+            return None
+        if isinstance(data, np.generic):
+            return data.item()
+        if isinstance(data, np.ndarray):
+            return data.tolist()
+        return super().default(data)
+
+    def dumps(self, data):
+        # don't serialize strings, bulk bodies are already encoded
+        if isinstance(data, str):
+            return data
+        if orjson is not None:
+            try:
+                return orjson.dumps(
+                    data, default=self.default,
+                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                ).decode("utf-8")
+            except TypeError:
+                pass  # e.g. a numpy NaT, which orjson rejects: the json encoder writes null
+        try:
+            try:
+                return json.dumps(data, default=self.default, ensure_ascii=False,
+                                  separators=(",", ":"), allow_nan=False)
+            except ValueError:
+                # NaN or infinity, which are not JSON
+                return json.dumps(_finite(data), default=self.default, ensure_ascii=False,
+                                  separators=(",", ":"), allow_nan=False)
+        except (ValueError, TypeError) as e:
+            raise SerializationError(data, e)
+
+
+def _clean_strings(series, fill, replacements=None):
+    """Fill, stringify and strip a column, working once per distinct value
+
+    Values are factorized (or taken from the categorical codes), the distinct
+    values cleaned, and the result gathered back with a single take, so
+    repeated titles and categories are only stripped once.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    cleaned = pd.Index(uniques).astype(str).str.strip()
+    if replacements:
+        cleaned = cleaned.map(lambda value: replacements.get(value, value))
+    # Missing values have code -1, which picks the fill value appended last
+    lookup = np.append(cleaned.to_numpy(dtype=object), fill)
+    return pd.Series(lookup[codes], index=series.index, name=series.name)
+
+
+def _is_mapped(column):
+    """Column filter for read_csv: only load the mapped fields"""
+    return column in MAPPED_FIELDS
+
+
+def read_frame(file_path):
+    """Read a source file with explicit column dtypes, the logic behind ETLService.read_data
+
+    Parquet (.parquet/.pq) and Feather/Arrow IPC (.feather/.arrow) files
+    are read as columnar data; anything else is parsed as CSV. Only the
+    mapped fields are loaded in every case.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in PARQUET_EXTENSIONS:
+        return pd.read_parquet(file_path, columns=MAPPED_FIELDS)
+    if extension in FEATHER_EXTENSIONS:
+        return pd.read_feather(file_path, columns=MAPPED_FIELDS)
+    try:
+        return pd.read_csv(file_path, dtype=READ_DTYPES, usecols=_is_mapped)
+    except (TypeError, ValueError) as e:
+        # Non-integer text in a numeric column: let transform_frame coerce it
+        logger.warning(f"Typed read failed ({e}), reading numeric columns untyped")
+        return pd.read_csv(file_path, dtype=CATEGORICAL_DTYPES, usecols=_is_mapped)
+
+
+def transform_frame(df):
+    """Clean a raw review frame, the logic behind ETLService.transform_data
+
+    Columns are replaced rather than modified, so the caller's frame is left
+    untouched without paying for a deep copy.
+    """
+    # Only drop rows where Rating is missing, as it's the most critical field
+    missing_rating = df['Rating'].isna().to_numpy()
+    if missing_rating.any():
+        df = df.take(np.flatnonzero(~missing_rating))
+    else:
+        df = df.copy(deep=False)
+
+    # Clean text fields, but preserve original case
+    for field in ['Title', 'Review Text']:
+        df[field] = _clean_strings(df[field], '')
+
+    # Clean categorical fields, preserving original case and fixing known typos
+    df['Division Name'] = _clean_strings(df['Division Name'], 'Unknown', DIVISION_TYPOS)
+    for field in ['Department Name', 'Class Name']:
+        df[field] = _clean_strings(df[field], 'Unknown')
+
+    # Handle numeric fields more carefully
+    df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
+    df['Age'] = df['Age'].fillna(-1).clip(0, 100).astype(int)  # Use -1 for unknown age
+
+    df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
+    df['Rating'] = df['Rating'].clip(1, 5).astype(int)  # Ratings must be 1-5
+
+    # Other integer fields can be 0 when missing
+    for field in ['Recommended IND', 'Positive Feedback Count', 'Clothing ID']:
+        df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0).astype(int)
+
+    return df
+
+
+def _legacy_transform(df):
+    """Original ETLService.transform_data, kept as the reference transform_frame is
+    tested and benchmarked against"""
+    df = df.copy()
+    df = df.dropna(subset=['Rating'])
+
+    for field in ['Title', 'Review Text']:
+        df[field] = df[field].fillna('').astype(str).str.strip()
+
+    for field in ['Division Name', 'Department Name', 'Class Name']:
+        df[field] = df[field].fillna('Unknown').astype(str).str.strip()
+        if field == 'Division Name':
+            df[field] = df[field].replace({'Initmates': 'Intimates', 'initmates': 'Intimates'})
+
+    df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
+    df['Age'] = df['Age'].fillna(-1).clip(0, 100).astype(int)
+
+    df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
+    df['Rating'] = df['Rating'].clip(1, 5).astype(int)
+
+    for field in ['Recommended IND', 'Positive Feedback Count', 'Clothing ID']:
+        df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0).astype(int)
+
+    return df
+
+
+def index_mapping():
+    """Mapping and analysis settings of the review index
+
+    Categoricals are keyword-only with eager global ordinals, so the
+    terms aggregations do not build ordinals on the first query after a
+    refresh. Positive Feedback Count is only ever summed, so it keeps doc
+    values but no inverted index. Review text goes through
+    review_analyzer (stop words removed, light English stemming) and
+    keeps a keyword subfield for missing/terms aggregations.
+    """
+    text_field = {
+        "type": "text",
+        "analyzer": "review_analyzer",
+        # Reviews are filtered and aggregated, never ranked by length
+        "norms": False,
+        "fields": {
+            "keyword": {"type": "keyword", "ignore_above": 256}
+        }
+    }
+    categorical_field = {"type": "keyword", "eager_global_ordinals": True}
+    return {
+        "settings": {
+            "number_of_shards": 1,
+            "number_of_replicas": 0,
+            "analysis": {
+                "filter": {
+                    "english_stop": {"type": "stop", "stopwords": "_english_"},
+                    "english_light_stemmer": {"type": "stemmer", "language": "light_english"}
+                },
+                "analyzer": {
+                    "review_analyzer": {
+                        "type": "custom",
+                        "tokenizer": "standard",
+                        "filter": ["lowercase", "asciifolding", "english_stop",
+                                   "english_light_stemmer"]
+                    }
+                }
+            }
+        },
+        "mappings": {
+            "properties": {
+                "Clothing ID": {"type": "integer"},
+                "Age": {"type": "integer"},
+                "Rating": {"type": "integer"},
+                "Recommended IND": {"type": "integer"},
+                "Positive Feedback Count": {"type": "integer", "index": False},
+                "Division Name": dict(categorical_field),
+                "Department Name": dict(categorical_field),
+                "Class Name": dict(categorical_field),
+                "Title": dict(text_field),
+                "Review Text": dict(text_field)
+            }
+        }
+    }
+
+
+def rollup_frame(df):
+    """Partial per-level aggregates of a transformed frame, {kind: DataFrame}
+
+    Only sums, counts and extremes are kept, so the partials of several
+    chunks can be combined exactly with merge_rollups.
+    """
+    rollups = {}
+    for kind, keys in ROLLUP_LEVELS.items():
+        rollups[kind] = df.groupby(keys, sort=False, observed=True).agg(
+            review_count=('Rating', 'size'),
+            rating_sum=('Rating', 'sum'),
+            rating_min=('Rating', 'min'),
+            rating_max=('Rating', 'max'),
+            positive_feedback=('Positive Feedback Count', 'sum'),
+            recommended=('Recommended IND', 'sum'),
+        )
+    return rollups
+
+
+def merge_rollups(parts):
+    """Combine rollup_frame results of several chunks into one"""
+    merged = {}
+    for kind, keys in ROLLUP_LEVELS.items():
+        frames = [part[kind] for part in parts]
+        if len(frames) == 1:
+            merged[kind] = frames[0]
+            continue
+        merged[kind] = pd.concat(frames).groupby(level=keys, sort=False).agg({
+            'review_count': 'sum', 'rating_sum': 'sum', 'rating_min': 'min',
+            'rating_max': 'max', 'positive_feedback': 'sum', 'recommended': 'sum',
+        })
+    return merged
+
+
 class ETLService:
-    def __init__(self, es_host="elasticsearch"):
+    def __init__(self, es_host="elasticsearch", pool_size=DEFAULT_POOL_SIZE,
+                 connect_timeout=CONNECT_TIMEOUT, sniff=False, http_compress=True, client=None):
+        """client, if given, is used as-is instead of connecting to es_host,
+        e.g. an InMemoryElasticsearch from src/etl/memory_backend.py
+        """
         self.es_host = es_host
         self.index_name = "eval_new"
-        self.es = self._connect_elasticsearch()
-        
-    def _wait_for_elasticsearch(self):
-        """Wait for Elasticsearch to be reachable"""
-        max_retries = 60  # wait up to 60 seconds
-        for i in range(max_retries):
-            try:
-                # Try to resolve the hostname first
-                socket.gethostbyname(self.es_host)
-                return True
-            except socket.gaierror:
-                if i < max_retries - 1:  # don't sleep on the last attempt
-                    logger.warning(f"Could not resolve hostname {self.es_host}, retrying in 1 second...")
-                    time.sleep(1)
-                continue
-        return False
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.sniff = sniff
+        self.http_compress = http_compress
+        self.metrics = ETLMetrics()
+        self._last_generation = 0
+        self.es = client if client is not None else self._connect_elasticsearch()
+
+    @property
+    def rollup_index_name(self):
+        """Name of the companion index holding the rollup summaries"""
+        return f"{self.index_name}{ROLLUP_SUFFIX}"
+
+    def _hosts(self):
+        """Expand es_host ("es1,es2:9201,https://es3") into full node URLs"""
+        hosts = []
+        for host in self.es_host.split(","):
+            host = host.strip()
+            if "://" not in host:
+                host = f"http://{host}"
+            if not re.search(r":\d+/?$", host):
+                host = f"{host}:9200"
+            hosts.append(host)
+        return hosts
 
     def _connect_elasticsearch(self):
-        """Connect to Elasticsearch with retries"""
-        if not self._wait_for_elasticsearch():
-            raise Exception(f"Could not resolve hostname {self.es_host} after 60 seconds")
+        """Connect to Elasticsearch, retrying with jittered exponential backoff
 
-        max_retries = 60  # wait up to 60 seconds
-        for i in range(max_retries):
+        A single client is built and reused: every node gets a pool of
+        pool_size persistent connections and request bodies are gzipped when
+        http_compress is set. With sniff=True the rest of the cluster is
+        discovered once connected and rediscovered when a node fails.
+        Attempts stop once connect_timeout seconds have passed.
+        """
+        hosts = self._hosts()
+        client = Elasticsearch(
+            hosts,
+            serializer=ETLSerializer(),
+            maxsize=self.pool_size,
+            http_compress=self.http_compress,
+            sniff_on_connection_fail=self.sniff,
+            sniffer_timeout=60 if self.sniff else None,
+            # A timed out bulk request may still have been applied: resending it
+            # is left to BatchRetry, which knows whether that is safe
+            retry_on_timeout=False,
+        )
+
+        deadline = time.monotonic() + self.connect_timeout
+        attempt = 0
+        while True:
             try:
-                client = Elasticsearch(f"http://{self.es_host}:9200")
                 if client.ping():
+                    if self.sniff:
+                        client.transport.sniff_hosts(initial=True)
                     logger.info("Successfully connected to Elasticsearch")
                     return client
+                error = "ping failed"
             except Exception as e:
-                if i < max_retries - 1:  # don't sleep on the last attempt
-                    logger.warning(f"Connection attempt failed: {str(e)}")
-                    time.sleep(1)
-                continue
-        
-        raise Exception("Could not connect to Elasticsearch after 60 seconds")
+                error = str(e)
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Full jitter keeps several ETL containers from retrying in lockstep
+            delay = min(remaining, random.uniform(0, min(MAX_CONNECT_BACKOFF, 0.1 * 2 ** attempt)))
+            logger.warning(f"Connection attempt to {', '.join(hosts)} failed ({error}), "
+                           f"retrying in {delay:.1f} seconds...")
+            time.sleep(delay)
+            attempt += 1
+
+        client.transport.close()
+        raise Exception(f"Could not connect to Elasticsearch after {self.connect_timeout} seconds")
         
     def read_data(self, file_path):
-        """Read the CSV data"""
+        """Read the source data with explicit column dtypes (see read_frame)"""
         logger.info(f"Reading data from {file_path}")
-        return pd.read_csv(file_path)
+        return read_frame(file_path)
+
+    def read_data_chunks(self, file_path, chunksize=DEFAULT_CHUNK_SIZE):
+        """Read the source data lazily, chunksize rows at a time"""
+        logger.info(f"Streaming data from {file_path} in chunks of {chunksize} rows")
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in PARQUET_EXTENSIONS or extension in FEATHER_EXTENSIONS:
+            return self._read_columnar_chunks(file_path, chunksize)
+        # Numeric dtypes are left to inference: a bad value could only surface mid-stream
+        return pd.read_csv(file_path, chunksize=chunksize, dtype=CATEGORICAL_DTYPES,
+                           usecols=_is_mapped)
+
+    def _read_columnar_chunks(self, file_path, chunksize):
+        """Yield DataFrames of at most chunksize rows from a Parquet or Feather file"""
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+
+        if os.path.splitext(file_path)[1].lower() in PARQUET_EXTENSIONS:
+            batches = pq.ParquetFile(file_path).iter_batches(batch_size=chunksize,
+                                                             columns=MAPPED_FIELDS)
+        else:
+            # Memory-mapped, so slicing the table does not load the whole file
+            table = feather.read_table(file_path, columns=MAPPED_FIELDS, memory_map=True)
+            batches = table.to_batches(max_chunksize=chunksize)
+        for batch in batches:
+            yield batch.to_pandas()
+
+    def cache_as_parquet(self, file_path):
+        """Convert a CSV to Parquet next to it once, return the Parquet path
+
+        The cache is rebuilt whenever the CSV is newer than it, so later runs
+        read the columnar copy and skip CSV parsing entirely.
+        """
+        parquet_path = os.path.splitext(file_path)[0] + PARQUET_EXTENSIONS[0]
+        if (os.path.exists(parquet_path)
+                and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path)):
+            logger.info(f"Using cached Parquet copy {parquet_path}")
+            return parquet_path
+        df = self.read_data(file_path)
+        logger.info(f"Caching {file_path} as {parquet_path}")
+        tmp_path = parquet_path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, parquet_path)
+        return parquet_path
         
     def transform_data(self, df):
         """Transform data before loading into Elasticsearch"""
-        # Make a copy to avoid SettingWithCopyWarning
-        df = df.copy()
-
-        # Only drop rows where Rating is missing, as it's the most critical field
-        df = df.dropna(subset=['Rating'])
-
-        # Clean text fields, but preserve original case
-        text_fields = ['Title', 'Review Text']
-        for field in text_fields:
-            df[field] = df[field].fillna('').astype(str).str.strip()
-
-        # Clean categorical fields, preserving original case
-        categorical_fields = ['Division Name', 'Department Name', 'Class Name']
-        for field in categorical_fields:
-            df[field] = df[field].fillna('Unknown').astype(str).str.strip()
-            # Fix known typos
-            if field == 'Division Name':
-                df[field] = df[field].replace({'Initmates': 'Intimates', 'initmates': 'Intimates'})
-
-        # Handle numeric fields more carefully
-        df['Age'] = pd.to_numeric(df['Age'], errors='coerce')
-        df['Age'] = df['Age'].fillna(-1).clip(0, 100).astype(int)  # Use -1 for unknown age
-        
-        df['Rating'] = pd.to_numeric(df['Rating'], errors='coerce')
-        df['Rating'] = df['Rating'].clip(1, 5).astype(int)  # Ratings must be 1-5
-        
-        # Other integer fields can be 0 when missing
-        other_int_fields = ['Recommended IND', 'Positive Feedback Count', 'Clothing ID']
-        for field in other_int_fields:
-            df[field] = pd.to_numeric(df[field], errors='coerce').fillna(0).astype(int)
-
-        return df
+        return transform_frame(df)
         
     def get_index_mapping(self):
-        """Get the Elasticsearch index mapping"""
+        """Get the Elasticsearch index mapping (see index_mapping)"""
+        return index_mapping()
+
+    def get_rollup_mapping(self):
+        """Get the mapping of the rollup index
+
+        Every summary carries _doc_count, so terms buckets over summaries
+        report the number of reviews behind them, not of summary documents.
+        """
+        categorical_field = {"type": "keyword"}
         return {
-            "settings": {
-                "number_of_shards": 1,
-                "number_of_replicas": 0,
-                # TODO: Ajoutez un analyzer personnalisé pour les reviews
-                # Exemple: "analysis": {"analyzer": {"review_analyzer": {...}}}
-            },
+            "settings": {"number_of_shards": 1, "number_of_replicas": 0},
             "mappings": {
+                "dynamic": "strict",
                 "properties": {
-                    # TODO: Définir le mapping correct pour chaque champ
-                    # Age: doit être "integer"
-                    # Rating: doit être "integer" 
-                    # Recommended IND: doit être "integer"
-                    # Positive Feedback Count: doit être "integer"
-                    # Clothing ID: doit être "integer"
-                    # Division Name: doit être "keyword"
-                    # Department Name: doit être "keyword"
-                    # Class Name: doit être "keyword"
-                    # Title: doit être "text" avec analyzer et champ "keyword"
-                    # Review Text: doit être "text" avec analyzer et champ "keyword"
-                    
-                    # VOTRE MAPPING ICI
-                    # Exemple:
-                    # "Age": {"type": "integer"},
-                    # "Department Name": {"type": "keyword"},
-                    # "Review Text": {
-                    #     "type": "text",
-                    #     "analyzer": "review_analyzer",
-                    #     "fields": {
-                    #         "keyword": {"type": "keyword", "ignore_above": 256}
-                    #     }
-                    # }
+                    "kind": {"type": "keyword"},
+                    "Clothing ID": {"type": "integer"},
+                    "Division Name": dict(categorical_field),
+                    "Department Name": dict(categorical_field),
+                    "Class Name": dict(categorical_field),
+                    "review_count": {"type": "integer"},
+                    "rating_sum": {"type": "long"},
+                    "rating_min": {"type": "byte"},
+                    "rating_max": {"type": "byte"},
+                    "avg_rating": {"type": "double"},
+                    "positive_feedback": {"type": "long"},
+                    "recommended": {"type": "long"},
+                    "recommended_ratio": {"type": "double"},
                 }
             }
         }
-        
-    def create_index(self):
+
+    def _index_body(self, bulk_ingest=False):
+        """Return the mapping, with the bulk ingest settings layered on top if asked
+
+        Every new index also gets a fresh data generation in its _meta.
+        """
+        body = self.get_index_mapping()
+        if bulk_ingest:
+            body["settings"] = {**body.get("settings", {}), **BULK_INGEST_SETTINGS}
+        mappings = body.setdefault("mappings", {})
+        mappings["_meta"] = {**mappings.get("_meta", {}), "generation": self._new_generation()}
+        return body
+
+    def data_fingerprint(self, file_path):
+        """Fingerprint of what a load of file_path would index
+
+        SHA-256 of the source file, of the index mapping and the transform
+        version; stored in the index _meta once a load completes.
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+        mapping = json.dumps(self.get_index_mapping(), sort_keys=True).encode()
+        return {
+            "source": digest.hexdigest(),
+            "mapping": hashlib.sha256(mapping).hexdigest(),
+            "transform": TRANSFORM_VERSION,
+        }
+
+    def live_fingerprint(self, index=None):
+        """Return the fingerprint stored in the _meta of index, None if absent"""
+        index = index or self.index_name
+        if not self.es.indices.exists(index=index):
+            return None
+        mappings = next(iter(self.es.indices.get_mapping(index=index).values()))["mappings"]
+        return mappings.get("_meta", {}).get("fingerprint")
+
+    def record_fingerprint(self, fingerprint, index=None):
+        """Store fingerprint in the _meta of index (or of the indices behind it)"""
+        index = index or self.index_name
+        for name, mapping in self.es.indices.get_mapping(index=index).items():
+            meta = {**mapping["mappings"].get("_meta", {}), "fingerprint": fingerprint}
+            self.es.indices.put_mapping(index=name, body={"_meta": meta})
+
+    def _record_load(self, file_path, fingerprint=None, index=None):
+        """Record the fingerprint of file_path unless documents of this run failed
+
+        A load with failed documents is not what the fingerprint describes: the
+        stored one is cleared instead, so the next skip_if_unchanged run loads
+        again (an incremental index keeps its _meta from earlier runs).
+        """
+        failed = self.metrics.bulk["failed"]
+        if failed:
+            logger.warning(f"{failed} documents failed, not recording the data fingerprint")
+            self.record_fingerprint(None, index)
+            return
+        self.record_fingerprint(fingerprint or self.data_fingerprint(file_path), index)
+
+    def wait_until_ready(self, index=None, timeout="30s"):
+        """Refresh index and wait until its shards can serve searches"""
+        index = index or self.index_name
+        self.es.indices.refresh(index=index)
+        self.es.cluster.health(index=index, wait_for_status="yellow", timeout=timeout)
+
+    def _new_generation(self):
+        """Return a data generation number, increasing from one load to the next"""
+        # Two generations issued within the same millisecond must still differ
+        self._last_generation = max(int(time.time() * 1000), self._last_generation + 1)
+        return self._last_generation
+
+    def bump_generation(self, index=None):
+        """Record a new data generation in the _meta of index (or of the indices behind it)
+
+        Query caches compare this generation with the one their results were
+        computed against, so they drop stale results after a reload.
+        """
+        index = index or self.index_name
+        for name, mapping in self.es.indices.get_mapping(index=index).items():
+            meta = {**mapping["mappings"].get("_meta", {}), "generation": self._new_generation()}
+            self.es.indices.put_mapping(index=name, body={"_meta": meta})
+
+    def create_index(self, bulk_ingest=False):
         """Create or recreate the Elasticsearch index with proper mappings"""
         logger.info(f"Setting up index: {self.index_name}")
-        
-        # Delete index if it exists
-        if self.es.indices.exists(index=self.index_name):
-            logger.info(f"Deleting existing index: {self.index_name}")
-            self.es.indices.delete(index=self.index_name)
+        self._delete_index_or_versions(self.index_name)
         
         # Create index with mapping
         logger.info(f"Creating index with mapping: {self.index_name}")
-        self.es.indices.create(index=self.index_name, body=self.get_index_mapping())
-        
-    def load_data(self, df):
-        """Load data into Elasticsearch"""
+        self.es.indices.create(index=self.index_name, body=self._index_body(bulk_ingest))
+        return self.index_name
+
+    def _delete_index_or_versions(self, name):
+        """Delete index name if it exists, or the versions behind the alias of that name"""
+        if self.es.indices.exists_alias(name=name):
+            for index in self.es.indices.get_alias(name=name):
+                logger.info(f"Deleting existing index: {index}")
+                self.es.indices.delete(index=index)
+        elif self.es.indices.exists(index=name):
+            logger.info(f"Deleting existing index: {name}")
+            self.es.indices.delete(index=name)
+
+    def create_versioned_index(self, bulk_ingest=False):
+        """Create a new timestamped index next to the live one, return its name"""
+        index = f"{self.index_name}_{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')[:17]}"
+        logger.info(f"Creating versioned index with mapping: {index}")
+        self.es.indices.create(index=index, body=self._index_body(bulk_ingest))
+        return index
+
+    def finalize_index(self, index=None, force_merge=False):
+        """Switch an index loaded with the bulk ingest profile back to serving settings
+
+        Refresh interval and translog durability go back to their defaults and
+        replicas to the count in get_index_mapping. The optional force merge to
+        a single segment runs before replicas are added, so they copy the merged
+        segment instead of merging themselves.
+        """
+        index = index or self.index_name
+        settings = self.get_index_mapping().get("settings", {})
+        logger.info(f"Restoring serving settings on {index}")
+        self.es.indices.put_settings(index=index, body={"index": {
+            "refresh_interval": settings.get("refresh_interval", "1s"),
+            "translog.durability": settings.get("translog.durability", "request"),
+        }})
+        self.es.indices.refresh(index=index)
+        if force_merge:
+            logger.info(f"Force-merging {index} to one segment")
+            self.es.indices.forcemerge(index=index, max_num_segments=1,
+                                       request_timeout=FORCE_MERGE_TIMEOUT)
+        self.es.indices.put_settings(index=index, body={"index": {
+            "number_of_replicas": settings.get("number_of_replicas", 1),
+        }})
+
+    def _index_versions(self, alias=None):
+        """Return {versioned index name: aliases} for the versions of alias (index_name)"""
+        alias = alias or self.index_name
+        pattern = re.compile(rf"^{re.escape(alias)}_\d{{17}}$")
+        indices = self.es.indices.get_alias(index=f"{alias}_*")
+        return {name: info.get("aliases", {}) for name, info in indices.items() if pattern.match(name)}
+
+    def rollup_version(self, index):
+        """Rollup index to load alongside index
+
+        A version of the index gets a rollup version with the same timestamp;
+        the live index gets the rollup index itself.
+        """
+        if index in (None, self.index_name):
+            return self.rollup_index_name
+        return self.rollup_index_name + index[len(self.index_name):]
+
+    def _alias_actions(self, alias, index):
+        """update_aliases actions moving alias from whatever it names to index"""
+        actions = []
+        if self.es.indices.exists_alias(name=alias):
+            for old in self.es.indices.get_alias(name=alias):
+                if old != index:
+                    actions.append({"remove": {"index": old, "alias": alias}})
+        elif self.es.indices.exists(index=alias):
+            actions.append({"remove_index": {"index": alias}})
+        actions.append({"add": {"index": index, "alias": alias}})
+        return actions
+
+    def swap_alias(self, index, rollup=False):
+        """Atomically point the index_name alias at index
+
+        Readers keep hitting the previous version until this single
+        update_aliases call lands. A concrete index still holding the alias
+        name (from a non-versioned run) is removed in the same call. With
+        rollup=True the rollup alias moves to the rollup version of index in
+        that same call, so both always describe the same data.
+        """
+        actions = self._alias_actions(self.index_name, index)
+        if rollup:
+            actions += self._alias_actions(self.rollup_index_name, self.rollup_version(index))
+        self.es.indices.update_aliases(body={"actions": actions})
+        logger.info(f"Alias {self.index_name} now points to {index}")
+
+    def cleanup_versions(self, keep=KEEP_VERSIONS):
+        """Delete all but the keep newest index and rollup versions, never an aliased one"""
+        for alias in (self.index_name, self.rollup_index_name):
+            versions = sorted(self._index_versions(alias).items(), reverse=True)
+            for name, aliases in versions[keep:]:
+                if alias not in aliases:
+                    logger.info(f"Deleting old index version: {name}")
+                    self.es.indices.delete(index=name)
+
+    def generate_actions(self, df, index=None, ids=None):
+        """Yield one bulk index action per row of df without materializing them all
+
+        Without ids Elasticsearch assigns its own, which is the fastest path for
+        full loads; incremental loads pass the deterministic document_ids.
+        """
+        index = index or self.index_name
+        columns = list(df.columns)
+        # tolist() converts numpy scalars to native Python types column by column
+        values = [df[column].tolist() for column in columns]
+        if ids is None:
+            for row in zip(*values):
+                yield {
+                    "_index": index,
+                    "_source": dict(zip(columns, row))
+                }
+        else:
+            for doc_id, row in zip(ids, zip(*values)):
+                yield {
+                    "_index": index,
+                    "_id": doc_id,
+                    "_source": dict(zip(columns, row))
+                }
+
+    def rollup_actions(self, rollups, index=None):
+        """Yield one bulk index action per summary document of merged rollups"""
+        index = index or self.rollup_index_name
+        for kind, frame in rollups.items():
+            keys = ROLLUP_LEVELS[kind]
+            frame = frame.reset_index()
+            columns = list(frame.columns)
+            for row in zip(*(frame[column].tolist() for column in columns)):
+                doc = dict(zip(columns, row))
+                doc["kind"] = kind
+                doc["avg_rating"] = doc["rating_sum"] / doc["review_count"]
+                doc["recommended_ratio"] = doc["recommended"] / doc["review_count"]
+                doc["_doc_count"] = doc["review_count"]
+                yield {
+                    "_index": index,
+                    "_id": ":".join([kind] + [str(doc[key]) for key in keys]),
+                    "_source": doc
+                }
+
+    def load_rollups(self, rollups, thread_count=1, index=None):
+        """Write the summaries in rollups to a new rollup index, return their number
+
+        The rollup index is small enough to be rebuilt on every load: by
+        default it is replaced in place, while a versioned run passes the
+        rollup_version of its target, published by swap_alias.
+        """
+        index = index or self.rollup_index_name
+        with self.metrics.stage("rollup") as span:
+            if index == self.rollup_index_name:
+                self._delete_index_or_versions(index)
+            body = self.get_rollup_mapping()
+            body["mappings"]["_meta"] = {"generation": self._new_generation()}
+            self.es.indices.create(index=index, body=body)
+            span["docs"] = self._bulk_index(self.rollup_actions(rollups, index),
+                                            thread_count=thread_count)
+            self.es.indices.refresh(index=index)
+        logger.info(f"Rollup index {index}: {span['docs']} summary documents")
+        return span["docs"]
+
+    def document_ids(self, df):
+        """Derive a stable _id per row from Clothing ID and a hash of the review
+
+        Reviews sharing product, title and text (typically empty ones) get an
+        occurrence suffix so they stay distinct documents.
+        """
+        review_hash = pd.util.hash_pandas_object(df[['Title', 'Review Text']], index=False)
+        ids = df['Clothing ID'].astype(str) + "-" + review_hash.map("{:016x}".format)
+        occurrence = ids.groupby(ids).cumcount()
+        duplicated = occurrence > 0
+        ids[duplicated] = ids[duplicated] + "-" + occurrence[duplicated].astype(str)
+        return ids
+
+    def row_hashes(self, df):
+        """Hash every transformed row so a changed document can be spotted"""
+        return pd.util.hash_pandas_object(df, index=False).map("{:016x}".format)
+
+    def _index_uuid(self, index):
+        """Return the uuid of the index (or aliased index) behind index, None if missing"""
+        if not self.es.indices.exists(index=index):
+            return None
+        settings = self.es.indices.get_settings(index=index, name="index.uuid")
+        return next(iter(settings.values()))["settings"]["index"]["uuid"]
+
+    def load_manifest(self, manifest_path):
+        """Read the manifest written by the last incremental run, None if absent"""
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest_path, index_uuid, ids, hashes):
+        """Record the document hashes that are now live in the index"""
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"index_uuid": index_uuid, "documents": dict(zip(ids, hashes))}, f)
+        os.replace(tmp_path, manifest_path)
+
+    def run_incremental(self, file_path, manifest_path=None, thread_count=1, rollup=False):
+        """Index only rows that are new or changed since the last run, delete removed ones
+
+        The manifest is only trusted for the exact index it was written against;
+        if the index was recreated or deleted since, everything is reloaded
+        with deterministic ids. With rollup=True the rollup index is rebuilt
+        from the whole file when anything changed or when it is missing.
+        """
+        manifest_path = manifest_path or file_path + MANIFEST_SUFFIX
+        df = self._extract_transform(file_path)
+        ids = self.document_ids(df)
+        hashes = self.row_hashes(df)
+
+        manifest = self.load_manifest(manifest_path)
+        index_uuid = self._index_uuid(self.index_name)
+        if manifest is None or index_uuid is None or manifest["index_uuid"] != index_uuid:
+            logger.info("No manifest matching the live index, reloading all documents")
+            with self.metrics.stage("create_index"):
+                self.create_index()
+            index_uuid = self._index_uuid(self.index_name)
+            previous = {}
+        else:
+            previous = manifest["documents"]
+
+        changed = (ids.map(previous) != hashes).to_numpy()
+        removed = previous.keys() - set(ids)
+        logger.info(f"Incremental load: {int(changed.sum())} new or changed, "
+                    f"{len(removed)} removed, {int((~changed).sum())} unchanged")
+
+        actions = self.generate_actions(df[changed], ids=ids[changed].tolist())
+        deletes = ({"_op_type": "delete", "_index": self.index_name, "_id": doc_id}
+                   for doc_id in removed)
+        failed_ids = []
+        with self.metrics.stage("load") as span:
+            indexed = self._bulk_index(chain(actions, deletes), thread_count=thread_count,
+                                       failed_ids=failed_ids)
+            self._finish_load(indexed)
+            span["docs"] = indexed
+        if changed.any() or removed:
+            self.bump_generation()
+        if rollup and (changed.any() or removed or
+                       not self.es.indices.exists(index=self.rollup_index_name)):
+            self.load_rollups(rollup_frame(df), thread_count)
+
+        # A failed write is left out of the manifest so the next run sends it
+        # again; a failed delete keeps its old entry so it is retried too
+        failed_ids = set(failed_ids)
+        written = ~ids.isin(failed_ids).to_numpy()
+        documents = dict(zip(ids[written], hashes[written]))
+        documents.update((doc_id, previous[doc_id]) for doc_id in removed & failed_ids)
+        self.save_manifest(manifest_path, index_uuid, list(documents), list(documents.values()))
+
+    def transform_chunks(self, chunks, processes=1, ordered=True):
+        """Transform raw chunks, in a pool of processes when processes > 1
+
+        At most two partitions per process are queued, so the reader never
+        gets far ahead of the pool. With ordered=False partitions are yielded
+        as soon as they are done instead of in input order. Worker processes
+        run transform_frame, not an overridden transform_data.
+        """
+        if processes <= 1:
+            for chunk in chunks:
+                with self.metrics.stage("transform") as span:
+                    df = self.transform_data(chunk)
+                    span["docs"] = len(df)
+                yield df
+            return
+
+        # spawn rather than fork: bulk indexing threads may already be running
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+            pending = deque()
+            for chunk in chunks:
+                if len(pending) >= processes * 2:
+                    yield from self._completed(pending, ordered)
+                pending.append(pool.submit(transform_frame, chunk))
+            while pending:
+                yield from self._completed(pending, ordered)
+
+    def _completed(self, pending, ordered):
+        """Pop and return finished transform results from the pending futures"""
+        if ordered:
+            return [pending.popleft().result()]
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            pending.remove(future)
+        return [future.result() for future in done]
+
+    def _timed_chunks(self, chunks):
+        """Yield chunks, timing each read as an extract stage"""
+        chunks = iter(chunks)
+        while True:
+            with self.metrics.stage("extract") as span:
+                chunk = next(chunks, None)
+                span["docs"] = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                return
+            yield chunk
+
+    def stream_actions(self, chunks, index=None, processes=1, ordered=True, rollup_parts=None):
+        """Transform each chunk as it arrives and yield its bulk actions
+
+        The rollup_frame of every chunk is appended to rollup_parts if given.
+        """
+        for df in self.transform_chunks(self._timed_chunks(chunks), processes, ordered):
+            logger.info(f"Transformed chunk: {len(df)} records")
+            if rollup_parts is not None:
+                rollup_parts.append(rollup_frame(df))
+            yield from self.generate_actions(df, index)
+
+    def _encode_action(self, action):
+        """Serialize one bulk action to its NDJSON lines, return (payload, nbytes)"""
+        action_line, source = helpers.expand_action(action)
+        serializer = self.es.transport.serializer
+        payload = serializer.dumps(action_line) + "\n"
+        if source is not None:
+            payload += serializer.dumps(source) + "\n"
+        return payload, len(payload.encode("utf-8"))
+
+    def _send_batch(self, batch):
+        """Index one batch of encoded actions, retrying rejected items with backoff
+
+        Items that fail for any other reason are logged and counted rather than
+        aborting the whole ETL run.
+        """
+        attempt = BatchRetry(self, batch)
+        while attempt.pending:
+            try:
+                delay = attempt.completed(self.es.bulk(body=attempt.body()))
+            except (ESConnectionError, TransportError) as e:
+                delay = attempt.failed(e)
+            if delay:
+                time.sleep(delay)
+        return attempt.result()
+
+    def _split_bulk_response(self, batch, response):
+        """Return (payloads to retry, ids of failed items) for a bulk response"""
+        retry = []
+        failed_ids = []
+        if response.get("errors"):
+            for payload, item in zip(batch, response["items"]):
+                result = next(iter(item.values()))
+                status = result.get("status", 200)
+                if status in RETRY_STATUSES:
+                    retry.append(payload)
+                elif status == 404 and "delete" in item:
+                    continue  # already gone, which is what a delete wants
+                elif status >= 300:
+                    failed_ids.append(result.get("_id"))
+                    logger.warning(f"Document rejected ({status}): {result.get('error')}")
+        return retry, failed_ids
+
+    @staticmethod
+    def _payload_id(payload):
+        """_id of an encoded action, None when Elasticsearch generates it"""
+        (meta,) = json.loads(payload.split("\n", 1)[0]).values()
+        return meta.get("_id")
+
+    def _backoff_delay(self, attempt):
+        """Capped exponential backoff before retry number attempt"""
+        return min(MAX_BACKOFF, INITIAL_BACKOFF * 2 ** (attempt - 1))
+
+    def _bulk_index(self, actions, chunk_size=DEFAULT_CHUNK_SIZE, thread_count=1,
+                    queue_size=DEFAULT_QUEUE_SIZE, failed_ids=None):
+        """Send actions to Elasticsearch in adaptive batches, return the number indexed
+
+        chunk_size is the starting document count per request; the batcher then
+        resizes it from observed latency and rejections, and never lets a
+        request grow past DEFAULT_MAX_BATCH_BYTES.
+        With thread_count > 1, up to thread_count bulk requests are in flight at
+        once and at most queue_size more batches are buffered behind them, so
+        memory stays bounded while the source generator keeps producing.
+        When failed_ids is a list, the _id of every action that could not be
+        applied is appended to it.
+        """
+        batcher = AdaptiveBatcher(initial_docs=chunk_size)
+        encoded = (self._encode_action(action) for action in actions)
+        start = time.perf_counter()
+        indexed = failed = 0
+
+        def record(result):
+            nonlocal indexed, failed
+            batcher.record(result)
+            self.metrics.record_batch(result)
+            indexed += result.docs
+            failed += result.failed
+            if failed_ids is not None:
+                failed_ids.extend(result.failed_ids)
+            logger.info(f"Indexed {result.docs} documents ({result.nbytes / 1024:.0f} KiB) "
+                        f"in {result.seconds * 1000:.0f} ms "
+                        f"({result.docs / result.seconds if result.seconds else 0:.0f} docs/s)")
+
+        if thread_count <= 1:
+            for batch in batcher.batches(encoded):
+                record(self._send_batch(batch))
+        else:
+            pending = deque()
+            with ThreadPoolExecutor(max_workers=thread_count) as pool:
+                for batch in batcher.batches(encoded):
+                    if len(pending) >= thread_count + queue_size:
+                        record(pending.popleft().result())
+                    pending.append(pool.submit(self._send_batch, batch))
+                while pending:
+                    record(pending.popleft().result())
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"Bulk indexing: {indexed} documents in {elapsed:.2f} s "
+                    f"({indexed / elapsed if elapsed else 0:.0f} docs/s, {thread_count} thread(s))")
+        if failed:
+            logger.error(f"{failed} documents could not be indexed")
+        return indexed
+
+    def _finish_load(self, indexed, index=None):
+        """Refresh index to make data available for search"""
+        self.es.indices.refresh(index=index or self.index_name)
+        logger.info(f"Data loading completed: {indexed} documents")
+
+    def load_data(self, df, chunk_size=DEFAULT_CHUNK_SIZE, thread_count=1,
+                  queue_size=DEFAULT_QUEUE_SIZE, index=None, rollup=False):
+        """Load data into Elasticsearch
+
+        With rollup=True per-product, per-class and per-department summaries
+        of df are also written to the rollup index (see load_rollups).
+        """
         logger.info("Loading data into Elasticsearch")
+        indexed = self._bulk_index(self.generate_actions(df, index), chunk_size, thread_count,
+                                   queue_size)
+        self._finish_load(indexed, index)
+        if rollup:
+            self.load_rollups(rollup_frame(df), thread_count, self.rollup_version(index))
+        return indexed
 
-        # Convert DataFrame to list of dicts
-        records = df.to_dict('records')
+    def load_stream(self, chunks, chunk_size=DEFAULT_CHUNK_SIZE, thread_count=1,
+                    queue_size=DEFAULT_QUEUE_SIZE, index=None, processes=1, ordered=True,
+                    rollup=False):
+        """Load an iterator of raw DataFrame chunks, keeping few chunks in memory at a time
 
-        # Use bulk helper to index data
-        actions = [
-            {
-                "_index": self.index_name,
-                "_source": record
-            }
-            for record in records
-        ]
-
-        # Process in batches of 1000
-        for i in range(0, len(actions), 1000):
-            batch = actions[i:i + 1000]
-            helpers.bulk(self.es, batch)
-            logger.info(f"Indexed {len(batch)} documents")
-
-        # Refresh index to make data available for search
-        self.es.indices.refresh(index=self.index_name)
-        logger.info("Data loading completed")
+        With processes > 1 chunks are transformed in a process pool while the
+        previous ones are being indexed. With rollup=True the summaries are
+        accumulated chunk by chunk and written once the stream is indexed.
+        """
+        logger.info("Streaming data into Elasticsearch")
+        rollup_parts = [] if rollup else None
+        actions = self.stream_actions(chunks, index, processes, ordered, rollup_parts)
+        indexed = self._bulk_index(actions, chunk_size, thread_count, queue_size)
+        self._finish_load(indexed, index)
+        if rollup_parts:
+            self.load_rollups(merge_rollups(rollup_parts), thread_count,
+                              self.rollup_version(index))
+        return indexed
         
-    def run_etl(self, file_path):
-        """Run the complete ETL process"""
-        try:
-            # Extract
+    def _create_target(self, versioned, bulk_ingest):
+        """Create the index a run loads into and return its name"""
+        with self.metrics.stage("create_index"):
+            if versioned:
+                return self.create_versioned_index(bulk_ingest)
+            return self.create_index(bulk_ingest)
+
+    def _extract_transform(self, file_path):
+        """Read and transform the whole file, timing both stages"""
+        with self.metrics.stage("extract") as span:
             df = self.read_data(file_path)
-            logger.info(f"Read {len(df)} records")
-            
-            # Transform
+            span["docs"] = len(df)
+        logger.info(f"Read {len(df)} records")
+
+        with self.metrics.stage("transform") as span:
             df = self.transform_data(df)
-            logger.info(f"Transformed data: {len(df)} records")
-            
-            # Load
-            self.create_index()
-            self.load_data(df)
+            span["docs"] = len(df)
+        logger.info(f"Transformed data: {len(df)} records")
+        return df
+
+    def run_etl(self, file_path, chunksize=None, thread_count=1, versioned=False,
+                keep_versions=KEEP_VERSIONS, bulk_ingest=False, force_merge=False,
+                incremental=False, manifest_path=None, parquet_cache=False, processes=1,
+                ordered=True, metrics_path=None, profile_path=None, rollup=False,
+                skip_if_unchanged=False):
+        """Run the complete ETL process
+
+        With chunksize set, the CSV is read, transformed and indexed chunk by
+        chunk so peak memory is bounded by the chunk size, not the file size.
+        thread_count > 1 keeps that many bulk requests in flight in parallel.
+        With versioned=True the data goes into a fresh timestamped index that
+        replaces the live one through an alias swap, so readers never see an
+        empty or missing index during a reload.
+        bulk_ingest=True creates the index with BULK_INGEST_SETTINGS and
+        restores serving settings once loaded, or once the load failed;
+        force_merge=True then merges it down to one segment for faster queries.
+        incremental=True only sends rows that changed since the previous
+        incremental run (see run_incremental) and ignores the options above
+        except thread_count.
+        parquet_cache=True reads a CSV through its cached Parquet copy (see
+        cache_as_parquet).
+        processes > 1 transforms partitions of DEFAULT_PARTITION_SIZE rows (or
+        chunksize) in a process pool that overlaps with indexing; ordered=False
+        indexes partitions in completion order.
+        Stage timings and bulk counters are collected in self.metrics and,
+        with metrics_path set, written there when the run ends, failed or not
+        (see ETLMetrics.write). profile_path runs the ETL under cProfile, dumps
+        the stats there and logs the hottest functions; only the calling
+        thread is profiled, not bulk threads or transform processes.
+        rollup=True also rebuilds the rollup index of per-product, per-class
+        and per-department summaries (see src/queries/rollup_queries.py).
+        Every run that indexed all documents stores a data_fingerprint in the
+        index _meta; skip_if_unchanged=True returns without loading anything when the live
+        index already holds that fingerprint (and the rollup index exists, if
+        asked for).
+        """
+        target = None
+        published = False
+        manifest_path = manifest_path or file_path + MANIFEST_SUFFIX
+        self.metrics.reset()
+        source_path = file_path
+        # Hashing the file is only worth it up front when it can save the load
+        fingerprint = self.data_fingerprint(file_path) if skip_if_unchanged else None
+        if skip_if_unchanged and self.live_fingerprint() == fingerprint and (
+                not rollup or self.es.indices.exists(index=self.rollup_index_name)):
+            logger.info(f"{self.index_name} already holds {file_path}, skipping the load")
+            self.metrics.finish("skipped")
+            if metrics_path:
+                self.metrics.write(metrics_path)
+            return
+        profiler = cProfile.Profile() if profile_path else None
+        if profiler:
+            profiler.enable()
+        try:
+            if parquet_cache and os.path.splitext(file_path)[1].lower() == '.csv':
+                file_path = self.cache_as_parquet(file_path)
+
+            if incremental:
+                self.run_incremental(file_path, manifest_path, thread_count, rollup)
+                self._record_load(source_path, fingerprint)
+                self.metrics.finish("success")
+                logger.info("ETL process completed successfully")
+                return
+
+            if chunksize or processes > 1:
+                partition_size = chunksize or DEFAULT_PARTITION_SIZE
+                target = self._create_target(versioned, bulk_ingest)
+                # Extract and transform are timed per chunk inside the load
+                with self.metrics.stage("load") as span:
+                    span["docs"] = self.load_stream(
+                        self.read_data_chunks(file_path, partition_size),
+                        chunksize or DEFAULT_CHUNK_SIZE, thread_count=thread_count,
+                        index=target, processes=processes, ordered=ordered, rollup=rollup)
+            else:
+                df = self._extract_transform(file_path)
+                target = self._create_target(versioned, bulk_ingest)
+                with self.metrics.stage("load") as span:
+                    span["docs"] = self.load_data(df, thread_count=thread_count, index=target,
+                                                  rollup=rollup)
+
+            if bulk_ingest or force_merge:
+                with self.metrics.stage("finalize"):
+                    self.finalize_index(target, force_merge=force_merge)
+
+            if not versioned:
+                # Readers saw this index while it was being filled: results cached
+                # under the generation written by create_index are partial
+                self.bump_generation(target)
+
+            self._record_load(source_path, fingerprint, target)
+
+            if versioned:
+                with self.metrics.stage("publish"):
+                    self.es.cluster.health(index=target, wait_for_status="yellow")
+                    self.swap_alias(target, rollup=rollup)
+                    published = True
+                    self.cleanup_versions(keep_versions)
             
+            self.metrics.finish("success")
             logger.info("ETL process completed successfully")
         except Exception as e:
+            self.metrics.finish("failed")
             logger.error(f"ETL process failed: {str(e)}")
+            if versioned and target and not published:
+                # The alias still points at the previous version: drop the partial one
+                self.es.indices.delete(index=target, ignore_unavailable=True)
+                if rollup:
+                    self.es.indices.delete(index=self.rollup_version(target),
+                                           ignore_unavailable=True)
+            elif bulk_ingest and target and not versioned:
+                # The partial index stays in place: it must not keep refresh and replicas off
+                try:
+                    self.finalize_index(target)
+                except Exception as restore_error:
+                    logger.error(f"Could not restore serving settings on {target}: "
+                                 f"{restore_error}")
             raise
+        finally:
+            if profiler:
+                profiler.disable()
+                self._dump_profile(profiler, profile_path)
+            if metrics_path:
+                self.metrics.write(metrics_path)
+                logger.info(f"ETL metrics written to {metrics_path}")
+
+    def _dump_profile(self, profiler, profile_path):
+        """Save cProfile stats for snakeviz/pstats and log the top functions"""
+        profiler.dump_stats(profile_path)
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        logger.info(f"Profile written to {profile_path}\n{report.getvalue()}")
 
 if __name__ == "__main__":
+    # Run from the repository root: python -m src.etl.etl_service
     # Get the Elasticsearch host from environment variable or use default
     es_host = os.getenv("ELASTICSEARCH_HOST", "elasticsearch")
+    # ES_BACKEND=memory loads into InMemoryElasticsearch, a dry run without a cluster
+    backend = os.getenv("ES_BACKEND", "elasticsearch")
+    data_file = os.getenv("ETL_DATA_FILE", "./data/Womens_Clothing.csv")
+    # Set ETL_CHUNK_SIZE to stream large files instead of loading them whole
+    chunksize = int(os.getenv("ETL_CHUNK_SIZE", "0")) or None
+    thread_count = int(os.getenv("ETL_BULK_THREADS", "1"))
+    # Set ETL_VERSIONED=1 to reload through a new index and an alias swap
+    versioned = os.getenv("ETL_VERSIONED", "0") == "1"
+    # ETL_BULK_INGEST=1 loads with refresh/replicas/translog relaxed, ETL_FORCE_MERGE=1 merges after
+    bulk_ingest = os.getenv("ETL_BULK_INGEST", "0") == "1"
+    force_merge = os.getenv("ETL_FORCE_MERGE", "0") == "1"
+    # ETL_INCREMENTAL=1 only sends rows that changed since the previous incremental run
+    incremental = os.getenv("ETL_INCREMENTAL", "0") == "1"
+    # ETL_PARQUET_CACHE=1 keeps a Parquet copy of the CSV next to it for later runs
+    parquet_cache = os.getenv("ETL_PARQUET_CACHE", "0") == "1"
+    # ETL_PROCESSES=N transforms partitions on N cores while indexing
+    processes = int(os.getenv("ETL_PROCESSES", "1"))
+    
+    # Comma-separated hosts are all used; ETL_SNIFF=1 discovers the rest of the cluster
+    pool_size = int(os.getenv("ELASTICSEARCH_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+    sniff = os.getenv("ETL_SNIFF", "0") == "1"
+    # ETL_METRICS_FILE gets the run metrics (.prom for Prometheus text, else JSON),
+    # ETL_METRICS_PORT serves them on /metrics, ETL_PROFILE saves a cProfile dump
+    metrics_path = os.getenv("ETL_METRICS_FILE") or None
+    metrics_port = int(os.getenv("ETL_METRICS_PORT", "0"))
+    profile_path = os.getenv("ETL_PROFILE") or None
+    # ETL_ROLLUP=1 also writes per-product/class/department summaries to eval_new_rollup
+    rollup = os.getenv("ETL_ROLLUP", "0") == "1"
+    # ETL_SKIP_UNCHANGED=1 keeps the live index when it was loaded from the same data
+    skip_if_unchanged = os.getenv("ETL_SKIP_UNCHANGED", "0") == "1"
     
     # Create ETL service and run ETL process
-    etl_service = ETLService(es_host=es_host)
-    etl_service.run_etl("./data/Womens_Clothing.csv")
\ No newline at end of file
+    if backend == "memory":
+        from src.etl.memory_backend import InMemoryElasticsearch
+        etl_service = ETLService(client=InMemoryElasticsearch())
+    else:
+        etl_service = ETLService(es_host=es_host, pool_size=pool_size, sniff=sniff)
+    if metrics_port:
+        etl_service.metrics.serve(metrics_port)
+    etl_service.run_etl(data_file, chunksize=chunksize,
+                        thread_count=thread_count, versioned=versioned,
+                        bulk_ingest=bulk_ingest, force_merge=force_merge,
+                        incremental=incremental, parquet_cache=parquet_cache,
+                        processes=processes, metrics_path=metrics_path,
+                        profile_path=profile_path, rollup=rollup,
+                        skip_if_unchanged=skip_if_unchanged)
\ No newline at end of file
@@ -0,0 +1,326 @@
+"""
+In-memory stand-in for the Elasticsearch client, for tests and offline runs
+
+InMemoryElasticsearch implements the endpoints ETLService, the query helpers
+and the tests call: index create/delete/exists, aliases, mappings and
+settings, bulk, refresh, count, search and msearch. Documents are kept per
+index as plain dicts and searches are answered by LocalEngine, so only the
+query subset it supports is available (see src/queries/local_engine.py).
+Errors are raised as the elasticsearch client's own exceptions.
+
+    etl = ETLService(client=InMemoryElasticsearch())
+"""
+import copy
+import fnmatch
+import itertools
+import json
+import uuid
+
+import pandas as pd
+from elasticsearch.exceptions import NotFoundError, RequestError
+
+from src.etl.etl_service import ETLSerializer
+from src.queries.local_engine import LocalEngine, UnsupportedQuery
+
+
+def _index_settings(settings):
+    """Normalize creation settings to the {"index": {...}} shape of get_settings"""
+    settings = copy.deepcopy(settings or {})
+    flat = settings.pop("index", {})
+    flat.update(settings)
+    nested = {}
+    for key, value in flat.items():
+        key = key[len("index."):] if key.startswith("index.") else key
+        *parents, leaf = key.split(".")
+        node = nested
+        for parent in parents:
+            node = node.setdefault(parent, {})
+        # Elasticsearch reports scalar settings as strings
+        node[leaf] = value if isinstance(value, (dict, list)) else str(value).lower() \
+            if isinstance(value, bool) else str(value)
+    return nested
+
+
+class _Index:
+    """Documents, mapping and settings of one index"""
+
+    def __init__(self, name, body):
+        body = body or {}
+        self.name = name
+        self.uuid = uuid.uuid4().hex[:22]
+        self.mappings = copy.deepcopy(body.get("mappings", {}))
+        self.settings = _index_settings(body.get("settings"))
+        self.settings.setdefault("number_of_shards", "1")
+        self.settings.setdefault("number_of_replicas", "1")
+        self.settings["uuid"] = self.uuid
+        self.settings["provided_name"] = name
+        self.docs = {}
+        self.aliases = set()
+        self._engine = None
+
+    def engine(self):
+        """LocalEngine over the current documents, rebuilt after writes"""
+        if self._engine is None:
+            frame = pd.DataFrame(list(self.docs.values()))
+            self._engine = LocalEngine(frame, {"mappings": self.mappings}, list(self.docs))
+        return self._engine
+
+    def written(self):
+        self._engine = None
+
+
+class _Transport:
+    def __init__(self, serializer):
+        self.serializer = serializer
+
+    def close(self):
+        pass
+
+
+class _Cluster:
+    def __init__(self, client):
+        self.client = client
+
+    def health(self, index=None, **params):
+        if index is not None:
+            self.client._resolve(index)
+        return {"cluster_name": "in-memory", "status": "green", "timed_out": False,
+                "number_of_nodes": 1, "number_of_data_nodes": 1,
+                "active_shards": len(self.client._indices)}
+
+
+class _Indices:
+    def __init__(self, client):
+        self.client = client
+
+    def exists(self, index, **params):
+        return all(self.client._names(name, must_exist=False) for name in index.split(","))
+
+    def exists_alias(self, name, index=None, **params):
+        return bool(self.client._aliased(name))
+
+    def create(self, index, body=None, **params):
+        if index in self.client._indices or self.client._aliased(index):
+            raise RequestError(400, "resource_already_exists_exception",
+                               {"error": {"reason": f"index [{index}] already exists"}})
+        self.client._indices[index] = _Index(index, body)
+        return {"acknowledged": True, "shards_acknowledged": True, "index": index}
+
+    def delete(self, index, ignore_unavailable=False, **params):
+        names = self.client._names(index, must_exist=not ignore_unavailable)
+        for name in names:
+            del self.client._indices[name]
+        return {"acknowledged": True}
+
+    def refresh(self, index=None, **params):
+        self.client._names(index or "*")
+        return {"_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+    def forcemerge(self, index=None, **params):
+        return self.refresh(index)
+
+    def clear_cache(self, index=None, **params):
+        return self.refresh(index)
+
+    def get_mapping(self, index=None, **params):
+        return {name: {"mappings": copy.deepcopy(self.client._indices[name].mappings)}
+                for name in self.client._names(index or "*")}
+
+    def put_mapping(self, body, index=None, **params):
+        for name in self.client._names(index or "*"):
+            mappings = self.client._indices[name].mappings
+            for key, value in body.items():
+                if key == "properties":
+                    mappings.setdefault("properties", {}).update(copy.deepcopy(value))
+                else:
+                    mappings[key] = copy.deepcopy(value)
+        return {"acknowledged": True}
+
+    def get_settings(self, index=None, name=None, **params):
+        result = {}
+        for index_name in self.client._names(index or "*"):
+            settings = copy.deepcopy(self.client._indices[index_name].settings)
+            if name is not None:
+                key = name[len("index."):] if name.startswith("index.") else name
+                settings = {key: settings[key]} if key in settings else {}
+            result[index_name] = {"settings": {"index": settings}}
+        return result
+
+    def put_settings(self, body, index=None, **params):
+        updates = _index_settings(body)
+        for name in self.client._names(index or "*"):
+            settings = self.client._indices[name].settings
+            for key, value in updates.items():
+                if isinstance(value, dict):
+                    settings.setdefault(key, {}).update(value)
+                else:
+                    settings[key] = value
+        return {"acknowledged": True}
+
+    def get_alias(self, index=None, name=None, **params):
+        indices = self.client._names(index or "*", must_exist=index is not None
+                                     and "*" not in index)
+        result = {}
+        for index_name in indices:
+            aliases = self.client._indices[index_name].aliases
+            selected = {alias for alias in aliases if name is None or fnmatch.fnmatch(alias, name)}
+            if name is None or selected:
+                result[index_name] = {"aliases": {alias: {} for alias in sorted(selected)}}
+        if name is not None and not result:
+            raise NotFoundError(404, f"alias [{name}] missing", {"error": f"alias [{name}] missing"})
+        return result
+
+    def update_aliases(self, body, **params):
+        for action in body["actions"]:
+            (kind, spec), = action.items()
+            if kind == "remove_index":
+                self.delete(spec["index"])
+                continue
+            for name in self.client._names(spec["index"]):
+                aliases = self.client._indices[name].aliases
+                if kind == "add":
+                    aliases.add(spec["alias"])
+                elif kind == "remove":
+                    aliases.discard(spec["alias"])
+        return {"acknowledged": True}
+
+    def stats(self, index=None, metric=None, **params):
+        indices = {}
+        for name in self.client._names(index or "*"):
+            docs = self.client._indices[name].docs
+            size = sum(len(json.dumps(doc, default=str)) for doc in docs.values())
+            primaries = {"docs": {"count": len(docs)}, "store": {"size_in_bytes": size},
+                         "segments": {"count": 1, "memory_in_bytes": 0}}
+            indices[name] = {"primaries": primaries, "total": primaries}
+        return {"indices": indices}
+
+
+class InMemoryElasticsearch:
+    """Elasticsearch client stand-in keeping every index in process memory
+
+    Only the calls used by this project are implemented; documents are
+    searchable as soon as they are written, refresh is accepted but not
+    needed. Bulk bodies are parsed like the real _bulk endpoint, so
+    ETLService drives it exactly as it drives a cluster.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._indices = {}
+        self._ids = itertools.count()
+        self.transport = _Transport(kwargs.get("serializer") or ETLSerializer())
+        self.indices = _Indices(self)
+        self.cluster = _Cluster(self)
+
+    # Name resolution
+
+    def _aliased(self, alias):
+        return [name for name, index in self._indices.items() if alias in index.aliases]
+
+    def _names(self, expression, must_exist=True):
+        """Concrete index names for an index/alias/wildcard expression"""
+        names = []
+        for part in str(expression).split(","):
+            if part in ("_all", "*"):
+                names.extend(self._indices)
+            elif "*" in part:
+                names.extend(name for name in self._indices if fnmatch.fnmatch(name, part))
+            elif part in self._indices:
+                names.append(part)
+            elif self._aliased(part):
+                names.extend(self._aliased(part))
+            elif must_exist:
+                raise NotFoundError(404, "index_not_found_exception",
+                                    {"error": {"type": "index_not_found_exception",
+                                               "reason": f"no such index [{part}]"}})
+        return list(dict.fromkeys(names))
+
+    def _resolve(self, index):
+        """The single index behind index, for searches and writes"""
+        names = self._names(index)
+        if len(names) != 1:
+            raise UnsupportedQuery(f"{index} resolves to {len(names)} indices, expected one")
+        return self._indices[names[0]]
+
+    def _write_index(self, name):
+        """Index to write a document to, created with dynamic mapping if missing"""
+        if name not in self._indices and not self._aliased(name):
+            self.indices.create(index=name)
+        return self._resolve(name)
+
+    # Endpoints
+
+    def ping(self, **params):
+        return True
+
+    def info(self, **params):
+        return {"name": "in-memory", "cluster_name": "in-memory",
+                "version": {"number": "7.15.0", "distribution": "in-memory"},
+                "tagline": "You Know, for Search"}
+
+    def close(self):
+        pass
+
+    def bulk(self, body, index=None, **params):
+        """Apply index/create/delete actions from an NDJSON body"""
+        if isinstance(body, bytes):
+            body = body.decode("utf-8")
+        lines = body.splitlines() if isinstance(body, str) else body
+        lines = [json.loads(line) if isinstance(line, str) else line for line in lines if line]
+        items = []
+        position = 0
+        while position < len(lines):
+            (op, meta), = lines[position].items()
+            position += 1
+            target = self._write_index(meta.get("_index") or index)
+            doc_id = meta.get("_id")
+            if op == "delete":
+                found = target.docs.pop(str(doc_id), None) is not None
+                status, result = (200, "deleted") if found else (404, "not_found")
+            else:
+                source = lines[position]
+                position += 1
+                doc_id = str(doc_id) if doc_id is not None else f"mem-{next(self._ids)}"
+                if op == "create" and doc_id in target.docs:
+                    items.append({op: {"_index": target.name, "_id": doc_id, "status": 409,
+                                       "error": {"type": "version_conflict_engine_exception"}}})
+                    continue
+                status, result = (200, "updated") if doc_id in target.docs else (201, "created")
+                target.docs[doc_id] = source
+            target.written()
+            items.append({op: {"_index": target.name, "_id": doc_id, "status": status,
+                               "result": result}})
+        errors = any(next(iter(item.values()))["status"] >= 300 and "delete" not in item
+                     for item in items)
+        return {"took": 0, "errors": errors, "items": items}
+
+    def count(self, index=None, body=None, **params):
+        target = self._resolve(index)
+        if body and "query" in body:
+            total = target.engine().search(
+                {"size": 0, "query": body["query"], "track_total_hits": True}
+            )["hits"]["total"]["value"]
+        else:
+            total = len(target.docs)
+        return {"count": total, "_shards": {"total": 1, "successful": 1, "failed": 0}}
+
+    def search(self, index=None, body=None, **params):
+        target = self._resolve(index)
+        response = target.engine().search(body, index=target.name, **params)
+        for hit in response["hits"]["hits"]:
+            # Documents as they were written, without the fields they lack
+            hit["_source"] = copy.deepcopy(target.docs[hit["_id"]])
+        return response
+
+    def msearch(self, body, index=None, **params):
+        """Run header/body pairs; a failing search only fails its own response"""
+        responses = []
+        for header, search in zip(body[::2], body[1::2]):
+            try:
+                response = self.search(index=header.get("index", index), body=search)
+                response["status"] = 200
+            except NotFoundError as e:
+                response = {"error": e.info["error"], "status": 404}
+            except (UnsupportedQuery, ValueError) as e:
+                response = {"error": {"type": type(e).__name__, "reason": str(e)}, "status": 400}
+            responses.append(response)
+        return {"took": 0, "responses": responses}
@@ -0,0 +1,185 @@
+"""
+Timings and counters of ETL runs, written as JSON or served to Prometheus
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the bulk request latency histogram exported to Prometheus
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class ETLMetrics:
+    """Timings and counters of ETL runs, exportable as JSON or Prometheus text
+
+    stage() times a named step (extract, transform, create_index, ...);
+    repeated stages, such as one transform per chunk, add up. record_batch()
+    counts each bulk request. Listeners added with add_listener are called
+    with (event, fields) after every stage and batch, which is the hook to
+    forward them to a tracing system.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far, at the start of a run"""
+        with self._lock:
+            self.started_at = time.time()
+            self.finished_at = None
+            self.status = "running"
+            self.stages = {}
+            self.bulk = {"requests": 0, "docs": 0, "bytes": 0, "seconds": 0.0,
+                         "retries": 0, "rejected": 0, "failed": 0}
+            self.latency_buckets = [0] * len(LATENCY_BUCKETS)
+
+    def add_listener(self, listener):
+        """Call listener(event, fields) for every finished stage and bulk request"""
+        self._listeners.append(listener)
+
+    def _emit(self, event, fields):
+        for listener in self._listeners:
+            listener(event, fields)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name; set span["docs"] to count documents"""
+        span = {"docs": 0}
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception:
+            span["error"] = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                totals = self.stages.setdefault(
+                    name, {"calls": 0, "seconds": 0.0, "docs": 0, "errors": 0})
+                totals["calls"] += 1
+                totals["seconds"] += seconds
+                totals["docs"] += span["docs"]
+                totals["errors"] += int(span.get("error", False))
+            self._emit(name, {"seconds": seconds, **span})
+
+    def record_batch(self, result):
+        """Count one bulk request from its BatchResult"""
+        with self._lock:
+            self.bulk["requests"] += 1
+            self.bulk["docs"] += result.docs
+            self.bulk["bytes"] += result.nbytes
+            self.bulk["seconds"] += result.seconds
+            self.bulk["retries"] += result.retries
+            self.bulk["rejected"] += result.rejected
+            self.bulk["failed"] += result.failed
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if result.seconds <= bound:
+                    self.latency_buckets[i] += 1
+        self._emit("bulk", result._asdict())
+
+    def finish(self, status):
+        """Mark the run as finished with a "success", "skipped" or "failed" status"""
+        with self._lock:
+            self.finished_at = time.time()
+            self.status = status
+
+    def to_dict(self):
+        """Snapshot of the metrics as plain JSON-compatible data"""
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                "status": self.status,
+                "started_at": datetime.utcfromtimestamp(self.started_at).isoformat() + "Z",
+                "duration_seconds": end - self.started_at,
+                "stages": {name: dict(totals) for name, totals in self.stages.items()},
+                "bulk": dict(self.bulk),
+            }
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.to_dict()
+        with self._lock:
+            buckets = list(self.latency_buckets)
+        lines = []
+
+        def metric(name, kind, help_text, samples, suffix=""):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{suffix}{labels} {value}")
+
+        stages = snapshot["stages"]
+        for key, kind, help_text in [
+            ("seconds", "etl_stage_duration_seconds_total", "Time spent in each ETL stage"),
+            ("calls", "etl_stage_calls_total", "Times each ETL stage ran"),
+            ("docs", "etl_stage_documents_total", "Documents handled by each ETL stage"),
+            ("errors", "etl_stage_errors_total", "ETL stage runs that raised"),
+        ]:
+            metric(kind, "counter", help_text,
+                   [(f'{{stage="{name}"}}', totals[key]) for name, totals in stages.items()])
+
+        bulk = snapshot["bulk"]
+        for key, help_text in [
+            ("requests", "Bulk requests sent"),
+            ("docs", "Documents indexed by bulk requests"),
+            ("bytes", "Bulk request payload bytes"),
+            ("retries", "Bulk request retries"),
+            ("rejected", "Bulk items rejected and retried"),
+            ("failed", "Bulk items that could not be indexed"),
+        ]:
+            name = "etl_bulk_documents_total" if key == "docs" else f"etl_bulk_{key}_total"
+            metric(name, "counter", help_text, [("", bulk[key])])
+
+        cumulative = [(f'{{le="{bound}"}}', count) for bound, count in zip(LATENCY_BUCKETS, buckets)]
+        metric("etl_bulk_request_duration_seconds", "histogram", "Bulk request latency",
+               cumulative + [('{le="+Inf"}', bulk["requests"])], suffix="_bucket")
+        lines.append(f"etl_bulk_request_duration_seconds_sum {bulk['seconds']}")
+        lines.append(f"etl_bulk_request_duration_seconds_count {bulk['requests']}")
+
+        metric("etl_run_duration_seconds", "gauge", "Duration of the last ETL run",
+               [("", snapshot["duration_seconds"])])
+        metric("etl_run_success", "gauge", "1 if the last ETL run succeeded",
+               [("", int(snapshot["status"] in ("success", "skipped")))])
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to path: Prometheus text for .prom files, JSON otherwise"""
+        content = (self.to_prometheus() if path.endswith(".prom")
+                   else json.dumps(self.to_dict(), indent=2))
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host="0.0.0.0"):
+        """Serve the Prometheus text on http://host:port/metrics from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # scrapes every few seconds would flood the ETL log
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        logger.info(f"Serving ETL metrics on http://{host}:{server.server_port}/metrics")
+        return server
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from src.etl.etl_service import ETLService
+from src.etl.memory_backend import InMemoryElasticsearch
+
+
+def make_reviews(rows, ratings=4, products=None):
+    """Raw reviews CSV rows, one per product (0..rows-1 unless products is given)
+
+    ratings is one rating for every row or a list with one per row.
+    """
+    return pd.DataFrame({
+        "Clothing ID": products if products is not None else range(rows), "Age": 30,
+        "Title": "Nice", "Review Text": "Soft",
+        "Rating": ratings, "Recommended IND": 1, "Positive Feedback Count": 0,
+        "Division Name": "General", "Department Name": "Tops", "Class Name": "Knits",
+    }, index=range(rows))
+
+
+@pytest.fixture
+def reviews():
+    """Factory of raw review frames, see make_reviews"""
+    return make_reviews
+
+
+@pytest.fixture
+def backend():
+    """Client class the etl fixture loads into; override it to swap in a fake"""
+    return InMemoryElasticsearch
+
+
+@pytest.fixture
+def etl(backend, tmp_path):
+    """ETL service over an empty backend, with a CSV path to write reviews to"""
+    etl = ETLService(client=backend())
+    etl.csv_path = str(tmp_path / "reviews.csv")
+    return etl
@@ -0,0 +1,95 @@
+import asyncio
+
+from elasticsearch.exceptions import TransportError
+
+from src.etl.async_loader import AsyncBulkLoader
+from src.etl.etl_service import transform_frame
+from src.queries.async_query_service import AsyncQueryService
+
+
+class AsyncInMemory:
+    """Awaitable facade over InMemoryElasticsearch, as AsyncElasticsearch is to the client
+
+    Searches whose body has a "sleep" key wait that many seconds first and
+    searches with "fail" raise a TransportError.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.indices = self
+        self.bulk_calls = 0
+
+    async def bulk(self, body, **params):
+        self.bulk_calls += 1
+        return self.client.bulk(body, **params)
+
+    async def refresh(self, index=None, **params):
+        return self.client.indices.refresh(index=index)
+
+    async def search(self, index=None, body=None, **params):
+        body = dict(body)
+        await asyncio.sleep(body.pop("sleep", 0))
+        if body.pop("fail", False):
+            raise TransportError(400, "search_phase_execution_exception", {})
+        return self.client.search(index=index, body=body, **params)
+
+    async def close(self):
+        pass
+
+
+def test_async_load_count(etl, reviews):
+    """Test that the async loader indexes every document, in several concurrent batches"""
+    etl.create_index()
+    client = AsyncInMemory(etl.es)
+
+    async def load():
+        async with AsyncBulkLoader(etl, client=client, concurrency=3) as loader:
+            return await loader.load_data(transform_frame(reviews(250)), chunk_size=50)
+
+    assert asyncio.run(load()) == 250
+    assert etl.es.count(index="eval_new")["count"] == 250
+    assert client.bulk_calls > 1 and etl.metrics.bulk["requests"] == client.bulk_calls
+    assert etl.metrics.bulk["docs"] == 250
+
+
+def test_async_load_retries_rejected_items(etl, reviews, monkeypatch):
+    """Test that items rejected with 429 are resent after the shared backoff"""
+    etl.create_index()
+    monkeypatch.setattr(etl, "_backoff_delay", lambda attempt: 0.001)
+    client = AsyncInMemory(etl.es)
+    bulk = client.bulk
+
+    async def reject_once(body, **params):
+        response = await bulk(body, **params)
+        if client.bulk_calls == 1:
+            next(iter(response["items"][0].values()))["status"] = 429
+            response["errors"] = True
+        return response
+
+    client.bulk = reject_once
+    result = asyncio.run(AsyncBulkLoader(etl, client=client).load_data(transform_frame(reviews(3))))
+    assert result == 3
+    assert client.bulk_calls == 2
+    assert (etl.metrics.bulk["retries"], etl.metrics.bulk["rejected"]) == (1, 1)
+
+
+def test_query_timeout_and_error_isolation(etl, reviews):
+    """Test that a slow or failing query only marks its own entry with an error"""
+    etl.create_index()
+    etl.load_data(transform_frame(reviews(4)))
+    queries = {
+        "count": {"size": 0, "track_total_hits": True},
+        "slow": {"size": 0, "sleep": 1},
+        "broken": {"size": 0, "fail": True},
+    }
+
+    async def run():
+        async with AsyncQueryService(client=AsyncInMemory(etl.es), timeout=0.05) as service:
+            return await service.run_queries(queries)
+
+    results = asyncio.run(run())
+    assert results["count"]["hits"]["total"]["value"] == 4
+    errors = results.errors()
+    assert set(errors) == {"slow", "broken"}
+    assert errors["slow"]["type"] == "timeout"
+    assert errors["broken"]["type"] == "TransportError"
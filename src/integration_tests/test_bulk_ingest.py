@@ -0,0 +1,35 @@
+import pytest
+
+from src.etl.etl_service import BULK_INGEST_SETTINGS
+
+
+def ingest_settings(etl):
+    """Return the settings the bulk ingest profile changes, as reported by the index"""
+    index = etl.es.indices.get_settings(index=etl.index_name)[etl.index_name]["settings"]["index"]
+    return {"refresh_interval": index.get("refresh_interval"),
+            "number_of_replicas": index.get("number_of_replicas"),
+            "translog.durability": index.get("translog", {}).get("durability")}
+
+
+def test_settings_restored_after_failed_load(etl, reviews, monkeypatch):
+    """Test that a bulk ingest load that fails leaves the index with its serving settings"""
+    reviews(5).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path, bulk_ingest=True)
+    serving = ingest_settings(etl)
+    assert serving["refresh_interval"] != BULK_INGEST_SETTINGS["refresh_interval"]
+    assert serving["translog.durability"] != BULK_INGEST_SETTINGS["translog.durability"]
+
+    seen_during_load = []
+    load_data = etl.load_data
+
+    def failing_load(df, **kwargs):
+        seen_during_load.append(ingest_settings(etl))
+        load_data(df.iloc[:2], **kwargs)
+        raise RuntimeError("node left the cluster")
+
+    monkeypatch.setattr(etl, "load_data", failing_load)
+    with pytest.raises(RuntimeError):
+        etl.run_etl(etl.csv_path, bulk_ingest=True)
+    assert seen_during_load == [{key: str(value) for key, value in BULK_INGEST_SETTINGS.items()}]
+    assert ingest_settings(etl) == serving
+    assert etl.metrics.status == "failed"
@@ -0,0 +1,99 @@
+import pytest
+from elasticsearch.exceptions import ConnectionTimeout
+
+from src.etl import etl_service
+from src.etl.etl_service import INITIAL_BACKOFF, MAX_RETRIES, transform_frame
+from src.etl.memory_backend import InMemoryElasticsearch
+
+
+class ScriptedElasticsearch(InMemoryElasticsearch):
+    """In-memory client whose bulk calls follow a script, one step per call
+
+    A step is an exception to raise (after applying the request when
+    applied is set) or a set of item positions to reject with 429; once the
+    script runs out, requests go through.
+    """
+
+    def __init__(self, script=(), applied=False):
+        super().__init__()
+        self.script = list(script)
+        self.applied = applied
+        self.bodies = []
+
+    def bulk(self, body, index=None, **params):
+        self.bodies.append(body)
+        step = self.script.pop(0) if self.script else set()
+        if isinstance(step, Exception):
+            if self.applied:
+                super().bulk(body, index, **params)
+            raise step
+        response = super().bulk(body, index, **params)
+        for position in step:
+            (op, item), = response["items"][position].items()
+            # A rejected item is not written
+            target = self._resolve(item["_index"])
+            target.docs.pop(item["_id"])
+            target.written()
+            error = {"type": "es_rejected_execution_exception"}
+            response["items"][position] = {op: {"_index": item["_index"], "_id": item["_id"],
+                                                "status": 429, "error": error}}
+            response["errors"] = True
+        return response
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays slept by the bulk loader, without sleeping"""
+    delays = []
+    monkeypatch.setattr(etl_service.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.fixture
+def backend():
+    """Load into the scripted client"""
+    return ScriptedElasticsearch
+
+
+@pytest.fixture
+def load(etl, reviews):
+    """Bulk index 4 reviews following script, return the number indexed"""
+
+    def load(script, ids=False, applied=False):
+        etl.es.script, etl.es.applied = list(script), applied
+        etl.create_index()
+        df = transform_frame(reviews(4))
+        doc_ids = [f"doc-{i}" for i in range(len(df))] if ids else None
+        return etl._bulk_index(etl.generate_actions(df, ids=doc_ids))
+
+    return load
+
+
+def test_rejected_items_retried_with_backoff(etl, load, sleeps):
+    """Test that only the items rejected with 429 are resent, after a growing backoff"""
+    indexed = load([{1, 3}, {0}])
+    assert indexed == 4
+    assert etl.es.count(index="eval_new")["count"] == 4
+    assert [body.count("\n") // 2 for body in etl.es.bodies] == [4, 2, 1]
+    assert sleeps == [INITIAL_BACKOFF, INITIAL_BACKOFF * 2]
+    assert (etl.metrics.bulk["retries"], etl.metrics.bulk["rejected"]) == (2, 3)
+
+
+def test_rejected_items_given_up_after_max_retries(etl, load, sleeps):
+    """Test that items still rejected after MAX_RETRIES count as failed"""
+    indexed = load([{0}] * (MAX_RETRIES + 1), ids=True)
+    assert indexed == 3
+    assert len(sleeps) == MAX_RETRIES
+    assert etl.metrics.bulk["failed"] == 1
+
+
+def test_connection_error_resends_only_idempotent_batches(etl, load, sleeps):
+    """Test that a timed out batch is resent only when every action has an _id"""
+    indexed = load([ConnectionTimeout("TIMEOUT", "timed out", None)], ids=True, applied=True)
+    assert indexed == 4
+    assert len(etl.es.bodies) == 2
+    assert etl.es.count(index="eval_new")["count"] == 4
+
+    with pytest.raises(ConnectionTimeout):
+        load([ConnectionTimeout("TIMEOUT", "timed out", None)], applied=True)
+    assert sleeps == [INITIAL_BACKOFF]
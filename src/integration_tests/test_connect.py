@@ -0,0 +1,87 @@
+import pytest
+from elasticsearch.exceptions import ConnectionError as ESConnectionError
+
+from src.etl import etl_service
+from src.etl.etl_service import MAX_CONNECT_BACKOFF, ETLSerializer, ETLService
+
+
+class FakeElasticsearch:
+    """Client whose ping answers follow pings: True, False or an exception to raise
+
+    Once pings runs out, every ping fails to connect.
+    """
+
+    pings = []
+    instances = []
+
+    def __init__(self, hosts, **kwargs):
+        self.hosts = hosts
+        self.kwargs = kwargs
+        self.ping_count = 0
+        self.closed = False
+        self.transport = self
+        self.instances.append(self)
+
+    def ping(self):
+        self.ping_count += 1
+        answer = self.pings.pop(0) if self.pings else ESConnectionError("N/A", "refused", None)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake monotonic clock advanced by time.sleep; returns the delays slept"""
+    now = [100.0]
+    delays = []
+
+    def sleep(delay):
+        delays.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(etl_service.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(etl_service.time, "sleep", sleep)
+    monkeypatch.setattr(etl_service, "Elasticsearch", FakeElasticsearch)
+    monkeypatch.setattr(FakeElasticsearch, "pings", [])
+    monkeypatch.setattr(FakeElasticsearch, "instances", [])
+    return delays
+
+
+def test_gives_up_at_the_deadline(clock, monkeypatch):
+    """Test the jittered exponential backoff and that attempts stop after connect_timeout"""
+    bounds = []
+
+    def uniform(low, high):
+        bounds.append((low, high))
+        return high
+
+    monkeypatch.setattr(etl_service.random, "uniform", uniform)
+    with pytest.raises(Exception, match="after 10 seconds"):
+        ETLService(es_host="es1,es2:9201", connect_timeout=10)
+
+    assert bounds[:7] == [(0, 0.1 * 2 ** attempt) for attempt in range(6)] + \
+        [(0, MAX_CONNECT_BACKOFF)]
+    assert sum(clock) == pytest.approx(10)
+    # The last delay is cut to the time left before the deadline
+    assert clock[-1] < bounds[len(clock) - 1][1]
+    (client,) = FakeElasticsearch.instances
+    assert client.ping_count == len(clock) + 1
+    assert client.closed
+
+
+def test_one_pooled_client_reused_across_attempts(clock):
+    """Test that a single pooled client is built and returned once a ping succeeds"""
+    FakeElasticsearch.pings = [ESConnectionError("N/A", "refused", None), False, True]
+    etl = ETLService(es_host="es1,https://es2", pool_size=8, connect_timeout=10)
+
+    (client,) = FakeElasticsearch.instances
+    assert etl.es is client and not client.closed
+    assert client.ping_count == 3 and len(clock) == 2
+    assert all(0 <= delay <= 0.1 * 2 ** attempt for attempt, delay in enumerate(clock))
+    assert client.hosts == ["http://es1:9200", "https://es2:9200"]
+    assert client.kwargs["maxsize"] == 8 and client.kwargs["retry_on_timeout"] is False
+    assert isinstance(client.kwargs["serializer"], ETLSerializer)
@@ -0,0 +1,29 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Directory the Dockerfiles copy to /app and the commands run from
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def test_etl_module_runs_like_the_dockerfile(tmp_path, reviews):
+    """Test that the ETL entry point of src/etl/Dockerfile runs from the repository root"""
+    csv_path = tmp_path / "reviews.csv"
+    reviews(2).to_csv(csv_path, index=False)
+    metrics_path = tmp_path / "metrics.json"
+    env = {**os.environ, "ES_BACKEND": "memory", "ETL_DATA_FILE": str(csv_path),
+           "ETL_METRICS_FILE": str(metrics_path)}
+    env.pop("PYTHONPATH", None)
+
+    dockerfile = (REPO_ROOT / "src/etl/Dockerfile").read_text()
+    command = json.loads(next(line for line in dockerfile.splitlines()
+                              if line.startswith("CMD "))[len("CMD "):])
+    assert command[0] == "python"
+    process = subprocess.run([sys.executable] + command[1:], cwd=REPO_ROOT,
+                             env=env, capture_output=True, text=True, timeout=120)
+    assert process.returncode == 0, process.stderr
+    metrics = json.loads(metrics_path.read_text())
+    assert metrics["status"] == "success"
+    assert metrics["bulk"]["docs"] == 2
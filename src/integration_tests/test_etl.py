@@ -1,13 +1,4 @@
-import pytest
-from elasticsearch import Elasticsearch
-import os
-
-@pytest.fixture(scope="session")
-def es_client():
-    """Create Elasticsearch client"""
-    host = os.getenv("ELASTICSEARCH_HOST", "elasticsearch")
-    es = Elasticsearch(hosts=[host])
-    return es
+# es_client comes from the root conftest.py, on the backend selected by ES_BACKEND
 
 def test_index_exists(es_client):
     """Test if the index was created"""
@@ -25,6 +16,17 @@ def test_index_mapping(es_client):
     assert "Class Name" in properties
     assert properties["Class Name"]["type"] == "keyword"
 
+def test_review_analyzer(es_client):
+    """Test if review text is indexed with the custom analyzer"""
+    settings = es_client.indices.get_settings(index="eval_new")
+    analysis = settings["eval_new"]["settings"]["index"]["analysis"]
+    assert "review_analyzer" in analysis["analyzer"]
+
+    mapping = es_client.indices.get_mapping(index="eval_new")
+    properties = mapping["eval_new"]["mappings"]["properties"]
+    assert properties["Review Text"]["analyzer"] == "review_analyzer"
+    assert properties["Review Text"]["fields"]["keyword"]["type"] == "keyword"
+
 def test_index_settings(es_client):
     """Test if the index has the correct settings"""
     settings = es_client.indices.get_settings(index="eval_new")
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from src.etl.etl_service import MANIFEST_SUFFIX
+from src.etl.memory_backend import InMemoryElasticsearch
+
+
+class FlakyElasticsearch(InMemoryElasticsearch):
+    """In-memory client rejecting index and delete actions for the given _ids"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_ids = set()
+
+    def bulk(self, body, index=None, **params):
+        lines = [json.loads(line) for line in body.splitlines() if line]
+        kept, rejected = [], []
+        position = 0
+        while position < len(lines):
+            (op, meta), = lines[position].items()
+            size = 1 if op == "delete" else 2
+            action = lines[position:position + size]
+            position += size
+            if meta.get("_id") in self.rejected_ids:
+                rejected.append({op: {"_index": meta["_index"], "_id": meta["_id"], "status": 400,
+                                      "error": {"type": "mapper_parsing_exception"}}})
+                kept.append(None)
+            else:
+                kept.append(action)
+        body = "".join(json.dumps(line) + "\n" for action in kept if action for line in action)
+        items = iter(super().bulk(body, index, **params)["items"] if body else [])
+        rejected = iter(rejected)
+        items = [next(items) if action else next(rejected) for action in kept]
+        return {"took": 0, "errors": any(next(iter(item.values()))["status"] >= 300
+                                         for item in items), "items": items}
+
+
+@pytest.fixture
+def backend():
+    """Load into the flaky client, so tests can reject chosen items"""
+    return FlakyElasticsearch
+
+
+@pytest.fixture
+def run(etl, reviews):
+    """Run an incremental load of ratings, return the (op, _id) of every action sent"""
+
+    def run(ratings, products=None):
+        reviews(len(ratings), ratings, products).to_csv(etl.csv_path, index=False)
+        sent = []
+        bulk_index = etl._bulk_index
+
+        def recording_bulk_index(actions, *args, **kwargs):
+            actions = list(actions)
+            sent.extend((action.get("_op_type", "index"), action["_id"]) for action in actions)
+            return bulk_index(iter(actions), *args, **kwargs)
+
+        etl._bulk_index = recording_bulk_index
+        etl.run_incremental(etl.csv_path)
+        del etl._bulk_index
+        return sent
+
+    return run
+
+
+def manifest(etl):
+    with open(etl.csv_path + MANIFEST_SUFFIX) as f:
+        return json.load(f)["documents"]
+
+
+def ratings(etl):
+    hits = etl.es.search(index="eval_new", body={"size": 100})["hits"]["hits"]
+    return sorted(hit["_source"]["Rating"] for hit in hits)
+
+
+def test_new_changed_and_removed_rows(etl, run):
+    """Test that only new or changed rows are sent and removed rows are deleted"""
+    first = run([5, 4, 3])
+    assert [op for op, _ in first] == ["index"] * 3
+    ids = [doc_id for _, doc_id in first]
+    assert set(manifest(etl)) == set(ids)
+
+    assert run([5, 4, 3]) == []
+
+    # Product 1 changes rating, product 2 is gone and product 3 is new
+    delta = {doc_id: op for op, doc_id in run([5, 1, 2], products=[0, 1, 3])}
+    assert sorted(delta.values()) == ["delete", "index", "index"]
+    assert delta[ids[2]] == "delete" and delta[ids[1]] == "index" and ids[0] not in delta
+    assert ratings(etl) == [1, 2, 5]
+    assert set(manifest(etl)) == set(ids[:2]) | {doc_id for doc_id, op in delta.items()
+                                                 if op == "index"}
+
+
+def test_manifest_of_another_index_reloads_everything(etl, run):
+    """Test that a manifest written against a recreated index is not trusted"""
+    run([5, 4])
+    etl.create_index()
+    assert etl.es.count(index="eval_new")["count"] == 0
+
+    sent = run([5, 4])
+    assert len(sent) == 2
+    assert ratings(etl) == [4, 5]
+
+
+def test_failed_items_are_resent(etl, run):
+    """Test that rows whose bulk item failed stay out of the manifest and are resent"""
+    ids = [doc_id for _, doc_id in run([5, 4, 3])]
+    etl.es.rejected_ids = {ids[0], ids[2]}
+
+    changed = run([1, 1])
+    assert sorted(changed) == sorted([("index", ids[0]), ("index", ids[1]), ("delete", ids[2])])
+    assert set(manifest(etl)) == {ids[1], ids[2]}
+    assert ratings(etl) == [1, 3, 5]
+
+    etl.es.rejected_ids = set()
+    assert sorted(run([1, 1])) == sorted([("index", ids[0]), ("delete", ids[2])])
+    assert set(manifest(etl)) == {ids[0], ids[1]}
+    assert ratings(etl) == [1, 1]
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def source(etl, reviews):
+    """CSV of 230 reviews with missing values, typos and rows without a rating"""
+    frame = reviews(230, ratings=np.tile([5, 4, 3, 2, 1], 46))
+    frame.loc[::7, "Title"] = None
+    frame.loc[::11, "Age"] = None
+    frame.loc[::13, "Division Name"] = "Initmates"
+    frame.loc[::17, "Rating"] = None
+    frame.to_csv(etl.csv_path, index=False)
+    return etl.csv_path
+
+
+def documents(etl):
+    """Sources of every document in the index, in a canonical order"""
+    hits = etl.es.search(index=etl.index_name, body={"size": 1000})["hits"]["hits"]
+    return sorted(json.dumps(hit["_source"], sort_keys=True) for hit in hits)
+
+
+@pytest.fixture
+def expected(etl, source):
+    """Documents indexed by load_data from the whole frame"""
+    etl.create_index()
+    indexed = etl.load_data(etl.transform_data(etl.read_data(source)))
+    assert indexed == 216
+    docs = documents(etl)
+    etl.create_index()
+    etl.metrics.reset()
+    return docs
+
+
+def test_stream_matches_load_data(etl, source, expected):
+    """Test that chunked streaming indexes the same documents as a whole-frame load"""
+    assert etl.load_stream(etl.read_data_chunks(source, chunksize=40), chunk_size=25) == 216
+    assert documents(etl) == expected
+
+    etl.run_etl(source, chunksize=40)
+    assert documents(etl) == expected
+    assert etl.metrics.stages["extract"]["docs"] == 230
+
+
+def test_thread_pool_matches_load_data(etl, source, expected, monkeypatch):
+    """Test that parallel bulk requests index the same documents, at most thread_count at once"""
+    in_flight = []
+    lock = threading.Lock()
+    active = 0
+    send_batch = etl._send_batch
+
+    def slow_send_batch(batch):
+        nonlocal active
+        with lock:
+            active += 1
+            in_flight.append(active)
+        # Long enough for the other workers to pick up their batch
+        time.sleep(0.01)
+        try:
+            return send_batch(batch)
+        finally:
+            with lock:
+                active -= 1
+
+    monkeypatch.setattr(etl, "_send_batch", slow_send_batch)
+    df = etl.transform_data(etl.read_data(source))
+    assert etl.load_data(df, chunk_size=10, thread_count=3, queue_size=1) == 216
+    assert documents(etl) == expected
+    assert 1 < max(in_flight) <= 3
+    assert etl.metrics.bulk["docs"] == 216 and etl.metrics.bulk["requests"] == len(in_flight)
+
+
+def test_process_pool_matches_load_data(etl, source, expected):
+    """Test that transforming partitions in spawned processes indexes the same documents"""
+    chunks = etl.read_data_chunks(source, chunksize=40)
+    assert etl.load_stream(chunks, chunk_size=25, processes=2, ordered=False) == 216
+    assert documents(etl) == expected
+
+    etl.run_etl(source, chunksize=40, processes=2)
+    assert documents(etl) == expected
+    assert etl.metrics.stages["load"]["docs"] == 216
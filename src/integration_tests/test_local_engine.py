@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from src.etl.etl_service import ETLService
+from src.etl.memory_backend import InMemoryElasticsearch
+from src.queries.local_engine import LocalEngine, UnsupportedQuery
+
+
+@pytest.fixture
+def engine():
+    """Engine over a handful of transformed reviews"""
+    return LocalEngine(pd.DataFrame({
+        "Clothing ID": [1, 1, 2, 2, 2, 3],
+        "Age": [25, 31, 44, 47, 68, 0],
+        "Title": ["Love it", "", "Nice", "Meh", "", "Great"],
+        "Review Text": ["Great dress", "x" * 300, "Runs small", "", "Too tight", "Perfect"],
+        "Rating": [5, 4, 2, 1, 3, 5],
+        "Recommended IND": [1, 1, 0, 0, 0, 1],
+        "Positive Feedback Count": [3, 0, 1, 7, 0, 2],
+        "Division Name": ["General", "General", "Intimates", "General", "General", "Intimates"],
+        "Department Name": ["Tops", "Dresses", "Intimate", "Tops", "Tops", "Intimate"],
+        "Class Name": ["Knits", "Dresses", "Lounge", "Knits", "Blouses", "Lounge"],
+    }))
+
+
+def test_terms_and_cardinality(engine):
+    """Test bucket counts, ordering and nested terms"""
+    result = engine.search({"size": 0, "aggs": {
+        "unique": {"cardinality": {"field": "Class Name"}},
+        "by_division": {
+            "terms": {"field": "Division Name"},
+            "aggs": {"by_department": {"terms": {"field": "Department Name", "size": 1}}}
+        }
+    }})
+    aggs = result["aggregations"]
+    assert result["hits"]["total"] == {"value": 6, "relation": "eq"}
+    assert aggs["unique"]["value"] == 4
+    general, intimates = aggs["by_division"]["buckets"]
+    assert (general["key"], general["doc_count"]) == ("General", 4)
+    assert general["by_department"]["buckets"] == [{"key": "Tops", "doc_count": 3}]
+    assert general["by_department"]["sum_other_doc_count"] == 1
+    assert (intimates["key"], intimates["doc_count"]) == ("Intimates", 2)
+
+
+def test_mapping_semantics(engine):
+    """Test unmapped fields, ignore_above on keyword subfields and text fields"""
+    aggs = engine.search({"size": 0, "aggs": {
+        "unmapped": {"cardinality": {"field": "Class Name.keyword"}},
+        "missing_review": {"missing": {"field": "Review Text.keyword"}},
+    }})["aggregations"]
+    assert aggs["unmapped"]["value"] == 0
+    # The 300 character review is over ignore_above, the empty one is a value
+    assert aggs["missing_review"]["doc_count"] == 1
+
+    with pytest.raises(ValueError):
+        engine.search({"aggs": {"words": {"terms": {"field": "Review Text"}}}})
+    with pytest.raises(UnsupportedQuery):
+        engine.search({"aggs": {"words": {"significant_text": {"field": "Review Text"}}}})
+
+
+def test_metrics_and_histogram(engine):
+    """Test stats, metric ordering and histogram gap filling"""
+    result = engine.search({"size": 0, "query": {"range": {"Age": {"gt": 0}}}, "aggs": {
+        "age_stats": {"stats": {"field": "Age"}},
+        "ages": {"histogram": {"field": "Age", "interval": 20}},
+        "class_scores": {
+            "terms": {"field": "Class Name", "order": {"avg_score": "desc"}},
+            "aggs": {"avg_score": {"avg": {"field": "Rating"}}}
+        }
+    }})
+    aggs = result["aggregations"]
+    assert aggs["age_stats"] == {"count": 5, "min": 25.0, "max": 68.0, "avg": 43.0, "sum": 215.0}
+    assert [(b["key"], b["doc_count"]) for b in aggs["ages"]["buckets"]] == \
+        [(20.0, 2), (40.0, 2), (60.0, 1)]
+    assert [(b["key"], b["avg_score"]["value"]) for b in aggs["class_scores"]["buckets"]] == \
+        [("Dresses", 4.0), ("Blouses", 3.0), ("Knits", 3.0), ("Lounge", 2.0)]
+
+
+def test_bucket_pipelines(engine):
+    """Test bucket_script, bucket_selector and bucket_sort on product buckets"""
+    result = engine.search({"size": 0, "aggs": {"by_product": {
+        "terms": {"field": "Clothing ID", "size": 10},
+        "aggs": {
+            "avg_rating": {"avg": {"field": "Rating"}},
+            "feedback": {"sum": {"field": "Positive Feedback Count"}},
+            "score": {"bucket_script": {
+                "buckets_path": {"rating": "avg_rating", "reviews": "_count"},
+                "script": "params.rating * Math.log(1 + params.reviews)"
+            }},
+            "enough": {"bucket_selector": {
+                "buckets_path": {"reviews": "_count"}, "script": "params.reviews >= 2"
+            }},
+            "ranking": {"bucket_sort": {"sort": [{"score": {"order": "desc"}}], "size": 1}}
+        }
+    }}})
+    buckets = result["aggregations"]["by_product"]["buckets"]
+    assert [b["key"] for b in buckets] == [1]
+    assert buckets[0]["feedback"]["value"] == 3.0
+    assert buckets[0]["score"]["value"] == pytest.approx(4.5 * 1.0986122886681098)
+
+
+def test_from_file_reads_like_the_etl(reviews, tmp_path):
+    """Test that from_file reads Parquet and untyped CSV input like ETLService.read_data"""
+    frame = reviews(4, ratings=[5, 4, 3, 2])
+    frame["Age"] = ["30", "unknown", "41", "52"]
+    csv_path = str(tmp_path / "reviews.csv")
+    frame.to_csv(csv_path, index=False)
+    parquet_path = str(tmp_path / "reviews.parquet")
+    frame.to_parquet(parquet_path)
+
+    etl = ETLService(client=InMemoryElasticsearch())
+    for path in (csv_path, parquet_path):
+        expected = etl.transform_data(etl.read_data(path)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(LocalEngine.from_file(path).df, expected)
+    assert LocalEngine.from_file(csv_path).df["Age"].tolist() == [30, 0, 41, 52]
@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+from elasticsearch.exceptions import NotFoundError, RequestError
+
+from src.etl.etl_service import transform_frame
+from src.queries.query_runner import run_msearch
+
+
+def test_load_and_search(etl):
+    """Test that ETLService loads into the stand-in like into a cluster"""
+    df = transform_frame(pd.DataFrame({
+        "Clothing ID": [1, 2, 3],
+        "Age": [25, 40, 33],
+        "Title": ["Love it", "Meh", "Nice"],
+        "Review Text": ["Great dress", "Runs small", "Soft"],
+        "Rating": [5, 2, 4],
+        "Recommended IND": [1, 0, 1],
+        "Positive Feedback Count": [3, 0, 1],
+        "Division Name": ["General", "General", "Initmates"],
+        "Department Name": ["Dresses", "Tops", "Intimate"],
+        "Class Name": ["Dresses", "Knits", "Lounge"],
+    }))
+    etl.create_index()
+    assert etl.load_data(df) == 3
+
+    es = etl.es
+    assert es.indices.exists(index="eval_new")
+    assert es.count(index="eval_new")["count"] == 3
+    mapping = es.indices.get_mapping(index="eval_new")["eval_new"]["mappings"]
+    assert mapping["properties"]["Class Name"]["type"] == "keyword"
+
+    result = es.search(index="eval_new", body={
+        "size": 1,
+        "query": {"range": {"Rating": {"gte": 4}}},
+        "aggs": {"divisions": {"terms": {"field": "Division Name"}}}
+    })
+    assert result["hits"]["total"]["value"] == 2
+    assert set(result["hits"]["hits"][0]["_source"]) == set(df.columns)
+    assert [(b["key"], b["doc_count"]) for b in result["aggregations"]["divisions"]["buckets"]] \
+        == [("General", 1), ("Intimates", 1)]
+
+
+def test_errors_and_msearch(etl):
+    """Test client exceptions and per-search msearch errors"""
+    es = etl.es
+    es.indices.create(index="reviews")
+    with pytest.raises(RequestError):
+        es.indices.create(index="reviews")
+    with pytest.raises(NotFoundError):
+        es.search(index="missing", body={})
+    es.indices.delete(index="missing", ignore_unavailable=True)
+
+    response = es.bulk(body='{"index": {"_index": "reviews", "_id": "a"}}\n{"Rating": 5}\n'
+                            '{"delete": {"_index": "reviews", "_id": "b"}}\n')
+    assert not response["errors"]
+    assert [item[op]["status"] for item, op in zip(response["items"], ("index", "delete"))] \
+        == [201, 404]
+
+    responses = es.msearch(body=[
+        {"index": "reviews"}, {"size": 0, "aggs": {"top": {"max": {"field": "Rating"}}}},
+        {"index": "reviews"}, {"aggs": {"words": {"significant_text": {"field": "Title"}}}},
+    ])["responses"]
+    assert responses[0]["aggregations"]["top"]["value"] == 5.0
+    assert responses[1]["status"] == 400 and "error" in responses[1]
+
+
+def test_msearch_timeout(etl, monkeypatch):
+    """Test that run_msearch sends its timeout in every search without changing the queries"""
+    etl.es.indices.create(index="reviews")
+    sent = []
+    msearch = etl.es.msearch
+
+    def recording_msearch(body, **params):
+        sent.extend(body[1::2])
+        return msearch(body, **params)
+
+    monkeypatch.setattr(etl.es, "msearch", recording_msearch)
+    queries = {"all": {"size": 0}, "none": {"query": {"match_none": {}}}}
+    results = run_msearch(etl.es, queries, index="reviews", timeout="30s")
+    assert not results.errors()
+    assert [search["timeout"] for search in sent] == ["30s", "30s"]
+    assert queries == {"all": {"size": 0}, "none": {"query": {"match_none": {}}}}
+
+
+def test_skip_if_unchanged(etl, reviews):
+    """Test that a reload is skipped only while the data fingerprint matches"""
+    csv_path = etl.csv_path
+    rows = reviews(2)
+    rows.to_csv(csv_path, index=False)
+    etl.run_etl(csv_path, skip_if_unchanged=True)
+    assert etl.live_fingerprint() == etl.data_fingerprint(csv_path)
+
+    etl.run_etl(csv_path, skip_if_unchanged=True)
+    assert etl.metrics.status == "skipped"
+
+    rows.head(1).to_csv(csv_path, index=False)
+    etl.run_etl(csv_path, skip_if_unchanged=True)
+    assert etl.metrics.status == "success"
+    assert etl.es.count(index="eval_new")["count"] == 1
+
+
+def test_fingerprint_needs_a_complete_load(etl, reviews, monkeypatch):
+    """Test that a load with failed documents records no fingerprint"""
+    csv_path = etl.csv_path
+    reviews(2).to_csv(csv_path, index=False)
+    bulk = etl.es.bulk
+
+    def reject_first(body, **params):
+        response = bulk(body, **params)
+        item = next(iter(response["items"][0].values()))
+        item.update(status=400, error={"type": "mapper_parsing_exception"})
+        return {**response, "errors": True}
+
+    monkeypatch.setattr(etl.es, "bulk", reject_first)
+    etl.run_etl(csv_path, skip_if_unchanged=True)
+    assert etl.metrics.bulk["failed"] == 1
+    assert etl.live_fingerprint() is None
+
+    monkeypatch.setattr(etl.es, "bulk", bulk)
+    etl.run_etl(csv_path, skip_if_unchanged=True)
+    assert etl.metrics.status == "success"
+    assert etl.live_fingerprint() == etl.data_fingerprint(csv_path)
@@ -0,0 +1,56 @@
+import json
+import urllib.request
+
+from src.etl.metrics import LATENCY_BUCKETS
+
+
+def parse_prometheus(text):
+    """Return {sample name with labels: value} of a Prometheus text exposition"""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_run_metrics_exports(etl, reviews, tmp_path):
+    """Test the counters of a run and their JSON, Prometheus and /metrics exports"""
+    reviews(250).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path, chunksize=50)
+
+    metrics = etl.metrics
+    assert metrics.status == "success"
+    assert metrics.stages["load"]["docs"] == 250
+    assert metrics.stages["transform"]["docs"] == 250
+    assert metrics.bulk["docs"] == 250 and metrics.bulk["failed"] == 0
+    requests = metrics.bulk["requests"]
+    assert requests >= 1
+
+    json_path = str(tmp_path / "metrics.json")
+    metrics.write(json_path)
+    with open(json_path) as f:
+        assert json.load(f)["bulk"] == metrics.bulk
+
+    prom_path = str(tmp_path / "metrics.prom")
+    metrics.write(prom_path)
+    with open(prom_path) as f:
+        samples = parse_prometheus(f.read())
+    buckets = [samples[f'etl_bulk_request_duration_seconds_bucket{{le="{bound}"}}']
+               for bound in LATENCY_BUCKETS]
+    buckets.append(samples['etl_bulk_request_duration_seconds_bucket{le="+Inf"}'])
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == requests == samples["etl_bulk_request_duration_seconds_count"]
+    assert samples["etl_bulk_documents_total"] == 250
+    assert samples['etl_stage_documents_total{stage="load"}'] == 250
+    assert samples["etl_run_success"] == 1
+
+    server = metrics.serve(0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert parse_prometheus(response.read().decode("utf-8")) == samples
+    finally:
+        server.shutdown()
+        server.server_close()
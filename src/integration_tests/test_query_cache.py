@@ -0,0 +1,88 @@
+import pytest
+
+from src.queries import query_cache
+from src.queries.query_cache import QueryCache
+
+COUNT = {"size": 0, "track_total_hits": True}
+
+
+@pytest.fixture
+def etl(etl, reviews):
+    """ETL service with a 3 review index loaded in memory"""
+    reviews(3).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path)
+    return etl
+
+
+def total(response):
+    return response["hits"]["total"]["value"]
+
+
+def test_ttl_and_lru(etl, monkeypatch):
+    """Test that entries expire after ttl and the least recently used is evicted"""
+    now = [1000.0]
+    monkeypatch.setattr(query_cache.time, "time", lambda: now[0])
+    cache = QueryCache(etl.es, ttl=10, max_entries=2)
+    bodies = [{**COUNT, "query": {"term": {"Clothing ID": i}}} for i in range(3)]
+
+    cache.search("eval_new", bodies[0])
+    cache.search("eval_new", bodies[1])
+    cache.search("eval_new", bodies[0])  # bodies[1] is now least recently used
+    cache.search("eval_new", bodies[2])
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.search("eval_new", bodies[0])
+    cache.search("eval_new", bodies[1])
+    assert (cache.hits, cache.misses) == (2, 4)
+
+    now[0] += 11
+    cache.search("eval_new", bodies[1])
+    assert (cache.hits, cache.misses) == (2, 5)
+
+
+def test_invalidation_on_reload(etl, reviews):
+    """Test that results cached while a reload is running are not served after it"""
+    cache = QueryCache(etl.es, generation_check_interval=0)
+    assert total(cache.search("eval_new", COUNT)) == 3
+
+    load_data = etl.load_data
+    seen_during_load = []
+
+    def query_then_load(df, **kwargs):
+        seen_during_load.append(total(cache.search("eval_new", COUNT)))
+        return load_data(df, **kwargs)
+
+    etl.load_data = query_then_load
+    reviews(5).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path)
+    assert seen_during_load == [0]
+    assert total(cache.search("eval_new", COUNT)) == 5
+
+    cache.invalidate()
+    assert total(cache.search("eval_new", COUNT)) == 5
+    assert cache.misses == 4
+
+
+def test_disk_entries_of_an_old_generation_are_pruned(etl, reviews, tmp_path):
+    """Test that a reload removes the disk entries cached under the previous generation"""
+    cache_dir = tmp_path / "cache"
+    cache = QueryCache(etl.es, cache_dir=str(cache_dir), generation_check_interval=0)
+    assert total(cache.search("eval_new", COUNT)) == 3
+    generations = cache_dir / query_cache.GENERATIONS_FILE
+    old_entries = set(cache_dir.glob("*.json")) - {generations}
+    assert len(old_entries) == 1 and generations.exists()
+
+    # Another process still sees the entry of the current generation
+    assert total(QueryCache(etl.es, cache_dir=str(cache_dir)).search("eval_new", COUNT)) == 3
+    assert set(cache_dir.glob("*.json")) == old_entries | {generations}
+
+    reviews(5).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path)
+    later_run = QueryCache(etl.es, cache_dir=str(cache_dir))
+    assert total(later_run.search("eval_new", COUNT)) == 5
+    entries = set(cache_dir.glob("*.json")) - {generations}
+    assert len(entries) == 1 and not entries & old_entries
+
+    reviews(4).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path)
+    assert total(cache.search("eval_new", COUNT)) == 4
+    assert len(set(cache_dir.glob("*.json"))) == 2
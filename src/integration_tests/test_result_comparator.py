@@ -0,0 +1,71 @@
+import pytest
+
+from src.queries.result_comparator import (
+    IGNORE, Tolerance, assert_matches, compare, flatten
+)
+
+EXPECTED = {"age_histogram": {"buckets": [
+    {"key": 20.0, "doc_count": 100, "top_classes": {"buckets": [
+        {"key": "Dresses", "doc_count": 40}, {"key": "Knits", "doc_count": 30}]}},
+    {"key": 40.0, "doc_count": 80, "top_classes": {"buckets": [
+        {"key": "Dresses", "doc_count": 35}]}},
+]}}
+
+RULES = {
+    "age_histogram[*].top_classes": Tolerance(ordered=False),
+    "*doc_count": Tolerance(rel=0.1),
+}
+
+
+def actual(**changes):
+    """Histogram response close to EXPECTED, with an extra bucket and sub-bucket"""
+    response = {"age_histogram": {"buckets": [
+        {"key": 20.0, "doc_count": changes.get("count", 105), "top_classes": {
+            "doc_count_error_upper_bound": 0, "sum_other_doc_count": 0,
+            "buckets": [{"key": "Knits", "doc_count": 31}, {"key": "Dresses", "doc_count": 41},
+                        {"key": "Tops", "doc_count": 9}]}},
+        {"key": 40.0, "doc_count": 80, "top_classes": {"buckets": [
+            {"key": "Dresses", "doc_count": 35}]}},
+        {"key": 60.0, "doc_count": 12, "top_classes": {"buckets": []}},
+    ]}}
+    if changes.get("drop_last"):
+        del response["age_histogram"]["buckets"][1:]
+    return response
+
+
+def test_flatten_aligns_buckets_on_keys():
+    """Test the paths of nested buckets"""
+    flat = flatten(EXPECTED)
+    assert flat["age_histogram#1"] == 40
+    assert flat["age_histogram[20].top_classes#1"] == "Knits"
+    assert flat["age_histogram[20].top_classes[Knits].doc_count"] == 30
+
+
+def test_tolerances_and_order():
+    """Test numeric tolerances, unordered sub-buckets and extra actual buckets"""
+    comparison = assert_matches(EXPECTED, actual(), RULES)
+    assert comparison.checked == 10
+
+    comparison = compare(EXPECTED, actual(count=120), RULES)
+    assert [(d["path"], d["reason"]) for d in comparison.diffs] == \
+        [("age_histogram[20].doc_count", "out of tolerance")]
+    assert "allowed ±10" in comparison.explain()
+
+    # Sub-buckets are checked in order unless the list rule says otherwise
+    ordered = compare(EXPECTED, actual(), {"*doc_count": Tolerance(rel=0.1)})
+    assert {d["reason"] for d in ordered.diffs} == {"wrong key"}
+
+
+def test_length_overlap_and_ignore():
+    """Test that missing buckets fail, and the overlap and ignore rules"""
+    with pytest.raises(AssertionError, match="missing bucket"):
+        assert_matches(EXPECTED, actual(drop_last=True), RULES)
+
+    terms = {"terms": {"buckets": [{"key": k, "doc_count": 1} for k in "abcde"]}}
+    found = {"terms": {"buckets": [{"key": k, "doc_count": 9} for k in "xbcde"]}}
+    assert compare(terms, found, {"terms": Tolerance(overlap=0.8)}).ok
+    assert not compare(terms, found, {"terms": Tolerance(overlap=1.0)}).ok
+
+    stats = {"age_stats": {"min": 18, "avg": 43.2, "count": 23472}}
+    assert compare(stats, {"age_stats": {"min": 19, "avg": 44.0, "count": 1}},
+                   {"age_stats.count": IGNORE, "*": Tolerance(abs=2)}).ok
@@ -0,0 +1,81 @@
+import copy
+
+import numpy as np
+import pytest
+
+from src.queries.query_runner import run_msearch
+from src.queries.result_comparator import Tolerance, assert_matches
+from src.queries.rollup_queries import MIN_PRODUCT_REVIEWS, ROLLUP_INDEX, rollup_queries
+
+# The same aggregations over every review of the raw index
+RAW_QUERIES = {
+    "q2_5": {
+        "size": 0,
+        "aggs": {
+            "by_division": {
+                "terms": {"field": "Division Name", "size": 10},
+                "aggs": {
+                    "by_department": {"terms": {"field": "Department Name", "size": 10}}
+                }
+            }
+        }
+    },
+    "q4_3": {
+        "size": 0,
+        "aggs": {
+            "class_scores": {
+                "terms": {"field": "Class Name", "size": 30, "order": {"avg_score": "desc"}},
+                "aggs": {"avg_score": {"avg": {"field": "Rating"}}}
+            }
+        }
+    },
+}
+for name, order in (("q5_3", "desc"), ("q5_4", "asc")):
+    RAW_QUERIES[name] = {
+        "size": 0,
+        "aggs": {
+            "by_product": {
+                "terms": {
+                    "field": "Clothing ID",
+                    "size": 10,
+                    "min_doc_count": MIN_PRODUCT_REVIEWS,
+                    "order": [{"avg_rating": order}, {"positive_feedback": "desc"}]
+                },
+                "aggs": {
+                    "avg_rating": {"avg": {"field": "Rating"}},
+                    "review_count": {"value_count": {"field": "Rating"}},
+                    "positive_feedback": {"sum": {"field": "Positive Feedback Count"}}
+                }
+            }
+        }
+    }
+
+DEPARTMENTS = [("General", "Tops"), ("General", "Dresses"), ("General Petite", "Tops"),
+               ("General Petite", "Bottoms"), ("Intimates", "Intimate")]
+CLASSES = ["Knits", "Blouses", "Dresses", "Pants", "Lounge", "Sweaters"]
+
+
+@pytest.fixture
+def etl(etl, reviews):
+    """ETL service with varied reviews loaded with their rollup index"""
+    rng = np.random.default_rng(7)
+    rows = 400
+    frame = reviews(rows, ratings=rng.integers(1, 6, rows), products=rng.integers(0, 40, rows))
+    departments = rng.integers(0, len(DEPARTMENTS), rows)
+    frame["Division Name"] = [DEPARTMENTS[i][0] for i in departments]
+    frame["Department Name"] = [DEPARTMENTS[i][1] for i in departments]
+    frame["Class Name"] = rng.choice(CLASSES, rows)
+    frame["Positive Feedback Count"] = rng.integers(0, 20, rows)
+    frame.to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path, rollup=True)
+    return etl
+
+
+@pytest.mark.parametrize("name", sorted(rollup_queries))
+def test_rollup_query_matches_raw_aggregation(etl, name):
+    """Test that each rollup query answers like the aggregation over every review"""
+    raw = run_msearch(etl.es, {name: RAW_QUERIES[name]}, index=etl.index_name)[name]
+    rollup = run_msearch(etl.es, {name: copy.deepcopy(rollup_queries[name])},
+                         index=ROLLUP_INDEX)[name]
+    assert raw["aggregations"]
+    assert_matches(raw["aggregations"], rollup["aggregations"], {"*": Tolerance(rel=1e-9)})
@@ -0,0 +1,65 @@
+import datetime
+import decimal
+import json
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from elasticsearch.exceptions import SerializationError
+
+from src.etl import etl_service
+from src.etl.etl_service import ETLSerializer
+
+pytest.importorskip("orjson")
+
+VALUES = {
+    "int64": np.int64(3), "int8": np.int8(-2), "uint64": np.uint64(2 ** 63),
+    "float32": np.float32(0.5), "float64": np.float64(1 / 3), "bool": np.bool_(True),
+    "datetime64": np.datetime64("2024-01-02T03:04:05"), "datetime64_nat": np.datetime64("NaT"),
+    "array": np.array([[0.5, 1.5]]), "nan_array": np.array([1.0, np.nan]),
+    "timestamp": pd.Timestamp("2024-01-02 03:04:05", tz="UTC"), "nat": pd.NaT, "na": pd.NA,
+    "series": pd.Series([1, 2]), "categorical": pd.Categorical(["a"]),
+    "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, 6), "date": datetime.date(2024, 1, 2),
+    "decimal": decimal.Decimal("1.5"), "uuid": uuid.UUID(int=1),
+    "nan": float("nan"), "numpy_nan": np.float32("nan"), "inf": float("-inf"),
+    "text": "Très élégant ✓", "none": None, "list": [1, "a", None], 7: "int key",
+}
+
+
+def stdlib_dumps(data):
+    """ETLSerializer output without orjson"""
+    orjson = etl_service.orjson
+    etl_service.orjson = None
+    try:
+        return ETLSerializer().dumps(data)
+    finally:
+        etl_service.orjson = orjson
+
+
+@pytest.mark.parametrize("name", list(VALUES))
+def test_orjson_matches_stdlib(name):
+    """Test that orjson and the stdlib encoder write the same JSON for every supported value"""
+    data = {name: VALUES[name], "Rating": 5}
+    encoded = ETLSerializer().dumps(data)
+    assert encoded == stdlib_dumps(data)
+    json.loads(encoded)
+
+
+def test_missing_values_are_null():
+    """Test that NaN, infinity and NaT are written as null, a document Elasticsearch accepts"""
+    data = {"nan": float("nan"), "inf": np.inf, "nat": pd.NaT,
+            "datetime64_nat": np.datetime64("NaT"), "nested": [{"nan": np.float64("nan")}],
+            "nan_array": np.array([np.nan])}
+    expected = {"nan": None, "inf": None, "nat": None, "datetime64_nat": None,
+                "nested": [{"nan": None}], "nan_array": [None]}
+    assert json.loads(ETLSerializer().dumps(data)) == expected
+    assert json.loads(stdlib_dumps(data)) == expected
+
+
+def test_unsupported_values_raise():
+    """Test that both encoders reject what they cannot serialize"""
+    for dumps in (ETLSerializer().dumps, stdlib_dumps):
+        with pytest.raises(SerializationError):
+            dumps({"value": object()})
+    assert ETLSerializer().dumps('{"already": "encoded"}') == '{"already": "encoded"}'
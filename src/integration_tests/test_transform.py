@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.etl.etl_service import (
+    CATEGORICAL_DTYPES, READ_DTYPES, _legacy_transform, transform_frame
+)
+
+
+@pytest.fixture
+def raw_reviews():
+    """Raw rows covering the cleaning edge cases"""
+    return pd.DataFrame({
+        "Clothing ID": [1, 2, 3, 4],
+        "Age": [np.nan, 120, 35, 28],
+        "Title": [" Love it ", None, "Runs small", "Love it"],
+        "Review Text": [None, " Great dress", "Too tight", "Nice"],
+        "Rating": [7, 4, np.nan, 1],
+        "Recommended IND": [1, None, 0, 0],
+        "Positive Feedback Count": [None, 2, 3, 0],
+        "Division Name": ["Initmates", "General", " General ", None],
+        "Department Name": ["Intimate", None, "Tops", "Tops "],
+        "Class Name": ["Lounge", "Dresses", "Knits", None],
+    })
+
+
+def test_transform_edge_cases(raw_reviews):
+    """Test the documented cleaning rules"""
+    df = transform_frame(raw_reviews)
+
+    # Rows without Rating are dropped, the original index is kept
+    assert list(df.index) == [0, 1, 3]
+    assert list(df["Rating"]) == [5, 4, 1]
+    # Unknown age (-1) ends up clipped to 0, ages are capped at 100
+    assert list(df["Age"]) == [0, 100, 28]
+    assert list(df["Title"]) == ["Love it", "", "Love it"]
+    assert list(df["Review Text"]) == ["", "Great dress", "Nice"]
+    assert list(df["Division Name"]) == ["Intimates", "General", "Unknown"]
+    assert list(df["Department Name"]) == ["Intimate", "Unknown", "Tops"]
+    assert list(df["Recommended IND"]) == [1, 0, 0]
+    assert list(df["Positive Feedback Count"]) == [0, 2, 0]
+
+
+def test_transform_leaves_input_untouched(raw_reviews):
+    """Test that the caller's frame is not modified"""
+    before = raw_reviews.copy()
+    transform_frame(raw_reviews)
+    pd.testing.assert_frame_equal(raw_reviews, before)
+
+
+def test_transform_matches_legacy(raw_reviews):
+    """Test that transform_frame gives the output of the original transform"""
+    pd.testing.assert_frame_equal(transform_frame(raw_reviews), _legacy_transform(raw_reviews))
+
+
+@pytest.mark.parametrize("dtype", [READ_DTYPES, CATEGORICAL_DTYPES])
+def test_typed_read_matches_untyped(tmp_path, raw_reviews, dtype):
+    """Test that a typed read then transform_frame matches the original untyped path"""
+    path = tmp_path / "reviews.csv"
+    raw_reviews.to_csv(path, index=False)
+
+    expected = _legacy_transform(pd.read_csv(path))
+    result = transform_frame(pd.read_csv(path, dtype=dtype))
+    pd.testing.assert_frame_equal(result, expected)
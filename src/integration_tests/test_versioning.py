@@ -0,0 +1,65 @@
+import pytest
+
+
+def load(etl, frame, **options):
+    frame.to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path, versioned=True, **options)
+
+
+def aliased(etl, alias):
+    return list(etl.es.indices.get_alias(name=alias))
+
+
+def test_rollup_index_published_with_its_version(etl, reviews):
+    """Test that a versioned run versions the rollup index and swaps both aliases together"""
+    load(etl, reviews(3), rollup=True)
+    first = aliased(etl, "eval_new")
+    assert aliased(etl, "eval_new_rollup") == [etl.rollup_version(first[0])]
+
+    load(etl, reviews(5), rollup=True)
+    second = aliased(etl, "eval_new")
+    assert second != first
+    assert aliased(etl, "eval_new_rollup") == [etl.rollup_version(second[0])]
+    # The previous rollup version was kept as is, not rebuilt in place
+    assert etl.es.count(index=etl.rollup_version(first[0]))["count"] < \
+        etl.es.count(index="eval_new_rollup")["count"]
+
+
+def test_versioned_reload_replaces_concrete_index(etl, reviews):
+    """Test that the first versioned run turns a concrete eval_new into an alias"""
+    reviews(3).to_csv(etl.csv_path, index=False)
+    etl.run_etl(etl.csv_path)
+    assert not etl.es.indices.exists_alias(name="eval_new")
+
+    load(etl, reviews(5))
+    (version,) = aliased(etl, "eval_new")
+    assert version != "eval_new" and "eval_new" not in etl.es._indices
+    assert etl.es.count(index="eval_new")["count"] == 5
+
+
+def test_keep_versions_prunes_old_versions(etl, reviews):
+    """Test that only the keep_versions newest versions survive, the live one included"""
+    versions = []
+    for rows in (2, 3, 4, 5):
+        load(etl, reviews(rows), keep_versions=2)
+        versions += aliased(etl, "eval_new")
+    assert sorted(etl._index_versions()) == versions[-2:]
+    assert aliased(etl, "eval_new") == versions[-1:]
+    assert etl.es.count(index="eval_new")["count"] == 5
+
+
+def test_failed_load_deletes_partial_version(etl, reviews, monkeypatch):
+    """Test that a failing versioned run drops its index and leaves the live one serving"""
+    load(etl, reviews(3))
+    live = aliased(etl, "eval_new")
+
+    def broken_load(*args, **kwargs):
+        raise RuntimeError("bulk failed")
+
+    monkeypatch.setattr(etl, "load_data", broken_load)
+    with pytest.raises(RuntimeError):
+        load(etl, reviews(5))
+    assert etl.metrics.status == "failed"
+    assert sorted(etl._index_versions()) == live
+    assert aliased(etl, "eval_new") == live
+    assert etl.es.count(index="eval_new")["count"] == 3
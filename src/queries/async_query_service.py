@@ -0,0 +1,77 @@
+"""
+Asyncio query service running the exam aggregations concurrently
+
+Requires the async extra of the client: pip install "elasticsearch[async]==7.15.0"
+"""
+import asyncio
+import logging
+
+from elasticsearch import AsyncElasticsearch
+
+from src.queries.query_runner import DEFAULT_INDEX, MSearchResults, named_queries
+
+logger = logging.getLogger(__name__)
+
+# Concurrent searches per service, so one dashboard cannot flood the search thread pool
+DEFAULT_MAX_CONCURRENCY = 8
+
+
+class AsyncQueryService:
+    """Serve exam query results from an event loop without a thread per request
+
+    Each query runs as its own task with an optional timeout. A query that
+    fails or times out only marks its own entry with an error, as in
+    run_msearch. Cancelling run_queries cancels every in-flight search.
+    """
+
+    def __init__(self, hosts=None, index=DEFAULT_INDEX, client=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, timeout=None):
+        self.index = index
+        self.timeout = timeout
+        self._owns_client = client is None
+        self.es = client or AsyncElasticsearch(hosts or ["http://localhost:9200"])
+        self.max_concurrency = max_concurrency
+        # Created on first use: it must belong to the loop the service runs in
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the client if this service created it"""
+        if self._owns_client:
+            await self.es.close()
+
+    async def search(self, body, timeout=None):
+        """Run one search, raising asyncio.TimeoutError after timeout seconds"""
+        timeout = timeout if timeout is not None else self.timeout
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.wait_for(self.es.search(index=self.index, body=body), timeout)
+
+    async def _search_named(self, name, body, timeout):
+        """Run one search and turn its failure into an error entry"""
+        try:
+            return name, await self.search(body, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Query {name} timed out after {timeout or self.timeout} s")
+            return name, {"error": {"type": "timeout", "reason": "query timed out"}}
+        except Exception as e:
+            logger.warning(f"Query {name} failed: {e}")
+            return name, {"error": {"type": type(e).__name__, "reason": str(e)}}
+
+    async def run_queries(self, queries=None, timeout=None):
+        """Run queries concurrently and return their responses by name
+
+        queries takes the same forms as run_msearch: a query_list, a
+        {name: body} dict or None for the exam queries.
+        """
+        queries = named_queries(queries)
+        # gather cancels every pending search if run_queries itself is cancelled
+        results = await asyncio.gather(*(self._search_named(name, body, timeout)
+                                         for name, body in queries.items()))
+        return MSearchResults(results)
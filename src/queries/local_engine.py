@@ -0,0 +1,616 @@
+"""
+In-process evaluator for the aggregation DSL used by the exam queries
+
+LocalEngine answers searches over the transformed review DataFrame with
+pandas/NumPy instead of a running Elasticsearch, and returns responses shaped
+like those of Elasticsearch 7.15, so code reading result["aggregations"] works
+unchanged. Only the subset used by the exam is supported:
+
+- queries: match_all, match_none, term, terms, range, exists, bool, and match
+  on non-text fields
+- bucket aggregations: terms (nested, ordered by count, key or sub-aggregation),
+  histogram, range, missing, filter, filters
+- metric aggregations: cardinality (exact), stats, avg, sum, min, max,
+  value_count, weighted_avg
+- pipeline aggregations inside a bucket aggregation: bucket_sort,
+  bucket_selector and bucket_script (arithmetic painless expressions)
+
+Anything else, full-text queries and significant_text included, raises
+UnsupportedQuery. Field semantics follow the index mapping: text fields cannot
+be aggregated, unmapped fields aggregate as if empty and keyword subfields
+ignore values longer than their ignore_above, as Elasticsearch does. A
+_doc_count column counts as that many documents in bucket doc_counts, like
+the _doc_count field of pre-aggregated documents.
+"""
+import ast
+import math
+import operator
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.etl.etl_service import index_mapping, read_frame, transform_frame
+
+# Elasticsearch stops counting hits exactly past this unless track_total_hits is true
+TRACK_TOTAL_HITS = 10000
+
+BUCKET_PIPELINES = ("bucket_script", "bucket_selector", "bucket_sort")
+METRICS = ("cardinality", "stats", "avg", "sum", "min", "max", "value_count", "weighted_avg")
+INTEGER_TYPES = ("long", "integer", "short", "byte")
+
+
+class UnsupportedQuery(NotImplementedError):
+    """Raised for query or aggregation features outside the supported subset"""
+
+
+def _native(value):
+    """Turn a numpy scalar into the Python type Elasticsearch would return"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _float(value):
+    return None if value is None or (isinstance(value, float) and math.isnan(value)) \
+        else float(value)
+
+
+# Painless operators that have a direct Python counterpart
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+           ast.Div: operator.truediv, ast.Mod: operator.mod}
+_COMPARE = {ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt,
+            ast.LtE: operator.le, ast.Eq: operator.eq, ast.NotEq: operator.ne}
+_MATH = {"log": math.log, "log10": math.log10, "sqrt": math.sqrt, "pow": math.pow,
+         "max": max, "min": min, "abs": abs, "round": round, "exp": math.exp}
+
+
+def _script_source(script):
+    if isinstance(script, dict):
+        return script.get("source", script.get("inline", "")), script.get("params", {})
+    return script, {}
+
+
+def evaluate_script(script, variables):
+    """Evaluate an arithmetic/boolean painless expression such as
+    "params.sum / params.count > 3 && params.count >= 5"
+
+    Only params.<name>, numbers, arithmetic, comparisons, &&, ||, ! and
+    Math.<function> calls are understood; the expression is interpreted from
+    its syntax tree, never executed as Python.
+    """
+    source, params = _script_source(script)
+    values = {**params, **variables}
+    translated = (source.strip().rstrip(";").replace("&&", " and ").replace("||", " or ")
+                  .replace("return ", ""))
+    translated = re.sub(r"!(?!=)", " not ", translated)
+    try:
+        tree = ast.parse(translated, mode="eval")
+    except SyntaxError as e:
+        raise UnsupportedQuery(f"Unsupported script: {source}") from e
+
+    def run(node):
+        if isinstance(node, ast.Expression):
+            return run(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            if node.value.id == "params" and node.attr in values:
+                return values[node.attr]
+            raise UnsupportedQuery(f"Unknown variable {node.value.id}.{node.attr}")
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            left, right = run(node.left), run(node.right)
+            try:
+                return _BINARY[type(node.op)](left, right)
+            except ZeroDivisionError:
+                # Painless doubles divide to Infinity/NaN instead of raising
+                return math.nan if left == 0 else math.copysign(math.inf, left)
+        if isinstance(node, ast.UnaryOp):
+            operand = run(node.operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.Not):
+                return not operand
+        if isinstance(node, ast.BoolOp):
+            results = [run(value) for value in node.values]
+            return all(results) if isinstance(node.op, ast.And) else any(results)
+        if isinstance(node, ast.Compare) and all(type(op) in _COMPARE for op in node.ops):
+            left = run(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = run(comparator)
+                if not _COMPARE[type(op)](left, right):
+                    return False
+                left = right
+            return True
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Name) and node.func.value.id == "Math"
+                and node.func.attr in _MATH):
+            return _MATH[node.func.attr](*(run(arg) for arg in node.args))
+        raise UnsupportedQuery(f"Unsupported script: {source}")
+
+    return run(tree)
+
+
+def resolve_bucket_path(bucket, path):
+    """Read a buckets_path/order path ("_count", "avg", "stats.max", "f>avg") from a bucket"""
+    if path == "_count":
+        return bucket["doc_count"]
+    if path == "_key":
+        return bucket["key"]
+    *parents, last = path.split(">")
+    node = bucket
+    for name in parents:
+        node = node[name]
+    name, _, metric = last.partition(".")
+    if name not in node:
+        raise UnsupportedQuery(f"Unknown buckets path {path}")
+    value = node[name]
+    if metric:
+        return value[metric]
+    if "value" in value:
+        return value["value"]
+    return value["doc_count"]
+
+
+def _sort_buckets(buckets, criteria):
+    """Sort buckets in place by [(path, "asc"|"desc"), ...], first criterion first"""
+    for path, direction in reversed(criteria):
+        values = [(resolve_bucket_path(bucket, path), bucket) for bucket in buckets]
+        valued = [item for item in values if item[0] is not None]
+        # Successive stable sorts, so earlier criteria take precedence
+        valued.sort(key=lambda item: item[0], reverse=direction == "desc")
+        # Buckets without a value go last in either direction
+        buckets[:] = [bucket for _, bucket in valued] + \
+            [bucket for value, bucket in values if value is None]
+    return buckets
+
+
+def _order_criteria(order):
+    """Normalize an order ({"_count": "desc"} or a list of them) into [(path, direction)]"""
+    if isinstance(order, dict):
+        order = [order]
+    return [(path, direction) for item in order for path, direction in item.items()]
+
+
+class LocalEngine:
+    """Evaluate searches against a transformed review DataFrame
+
+    mapping is an index mapping body like ETLService.get_index_mapping(),
+    which decides keyword/text/unmapped semantics; it defaults to the
+    review index mapping. ids are the document ids reported in hits, the
+    row positions by default.
+    """
+
+    def __init__(self, df, mapping=None, ids=None):
+        df = df.reset_index(drop=True)
+        if "_doc_count" in df.columns:
+            self.doc_counts = df.pop("_doc_count").fillna(1).to_numpy(dtype=np.int64)
+        else:
+            self.doc_counts = None
+        self.df = df
+        self.ids = ids
+        mapping = mapping if mapping is not None else index_mapping()
+        self.properties = mapping.get("mappings", {}).get("properties", {})
+        self._columns = {}
+
+    @classmethod
+    def from_file(cls, file_path, mapping=None):
+        """Read and transform a source file (CSV, Parquet or Feather) the way the ETL does"""
+        return cls(transform_frame(read_frame(file_path)), mapping)
+
+    def search(self, body=None, index=None, **params):
+        """Return an Elasticsearch-shaped search response for body"""
+        start = time.perf_counter()
+        body = body or {}
+        rows = np.flatnonzero(self._query(body.get("query", {"match_all": {}})))
+        total = len(rows)
+        track = body.get("track_total_hits", params.get("track_total_hits", TRACK_TOTAL_HITS))
+        if track is True or (not isinstance(track, bool) and total <= track):
+            hits_total = {"value": total, "relation": "eq"}
+        elif track is False:
+            hits_total = None
+        else:
+            hits_total = {"value": track, "relation": "gte"}
+
+        size = body.get("size", params.get("size", 10))
+        offset = body.get("from", params.get("from_", 0))
+        hits = [{"_index": index,
+                 "_id": str(position) if self.ids is None else self.ids[position],
+                 "_score": 1.0,
+                 "_source": {k: _native(v) for k, v in self.df.iloc[position].items()}}
+                for position in rows[offset:offset + size]]
+        response = {
+            "took": 0,
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {"max_score": 1.0 if hits else None, "hits": hits},
+        }
+        if hits_total is not None:
+            response["hits"]["total"] = hits_total
+        aggs = body.get("aggs", body.get("aggregations"))
+        if aggs:
+            response["aggregations"] = self._aggregations(aggs, rows)
+        response["took"] = int((time.perf_counter() - start) * 1000)
+        return response
+
+    # Fields
+
+    def _field(self, field):
+        """Return (column name, mapping type, ignore_above) for field, or None if unmapped"""
+        name, _, subfield = field.partition(".")
+        if name not in self.df.columns:
+            return None
+        properties = self.properties.get(name)
+        if properties is None:
+            if self.properties:
+                return None
+            # No mapping given: object columns behave as keyword, the rest as numbers
+            kind = "keyword" if self.df[name].dtype == object else "long"
+            return name, kind, None
+        if subfield:
+            properties = properties.get("fields", {}).get(subfield)
+            if properties is None:
+                return None
+        return name, properties.get("type", "object"), properties.get("ignore_above")
+
+    def _column(self, field):
+        """Return (values, missing mask) of a field over all rows, None if unmapped"""
+        if field in self._columns:
+            return self._columns[field]
+        resolved = self._field(field)
+        if resolved is None:
+            column = None
+        else:
+            name, kind, ignore_above = resolved
+            if kind == "text":
+                raise ValueError(f"Text fields are not optimised for operations that require "
+                                 f"per-document field data: [{field}]. Use a keyword field "
+                                 f"instead.")
+            series = self.df[name]
+            missing = series.isna().to_numpy()
+            if ignore_above is not None:
+                missing |= series.astype(str).str.len().to_numpy() > ignore_above
+            values = series.to_numpy()
+            if kind in INTEGER_TYPES and values.dtype.kind == "f":
+                # Sparse integer columns are read as floats; keys stay integers
+                values = np.where(missing, 0, values).astype(np.int64)
+            column = (values, missing)
+        self._columns[field] = column
+        return column
+
+    def _is_text(self, field):
+        resolved = self._field(field)
+        return resolved is not None and resolved[1] == "text"
+
+    # Queries
+
+    def _query(self, query):
+        """Return a boolean mask over all rows for a query clause"""
+        n = len(self.df)
+        if not query:
+            return np.ones(n, dtype=bool)
+        if len(query) != 1:
+            raise UnsupportedQuery(f"Query clause must have one key: {list(query)}")
+        kind, spec = next(iter(query.items()))
+        if kind == "match_all":
+            return np.ones(n, dtype=bool)
+        if kind == "match_none":
+            return np.zeros(n, dtype=bool)
+        if kind == "bool":
+            return self._bool(spec)
+        if kind == "exists":
+            column = self._column(spec["field"])
+            return np.zeros(n, dtype=bool) if column is None else ~column[1]
+        if kind in ("term", "terms", "range", "match"):
+            field = next(iter(spec))
+            if self._is_text(field):
+                raise UnsupportedQuery(f"Full-text {kind} query on [{field}] is not supported")
+            column = self._column(field)
+            if column is None:
+                return np.zeros(n, dtype=bool)
+            values, missing = column
+            condition = spec[field]
+            if kind == "terms":
+                return ~missing & pd.Series(values).isin(condition).to_numpy()
+            if kind == "range":
+                return ~missing & self._range(values, condition)
+            if isinstance(condition, dict):
+                condition = condition.get("value", condition.get("query"))
+            return ~missing & (values == condition)
+        raise UnsupportedQuery(f"Unsupported query: {kind}")
+
+    def _bool(self, spec):
+        def clauses(key):
+            value = spec.get(key, [])
+            return [value] if isinstance(value, dict) else value
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for clause in clauses("must") + clauses("filter"):
+            mask &= self._query(clause)
+        for clause in clauses("must_not"):
+            mask &= ~self._query(clause)
+        should = clauses("should")
+        if should:
+            minimum = spec.get("minimum_should_match",
+                               0 if clauses("must") or clauses("filter") else 1)
+            matches = sum(self._query(clause).astype(int) for clause in should)
+            mask &= matches >= int(minimum)
+        return mask
+
+    def _range(self, values, condition):
+        values = values.astype(float)
+        mask = np.ones(len(values), dtype=bool)
+        for bound, compare in (("gt", np.greater), ("gte", np.greater_equal),
+                               ("lt", np.less), ("lte", np.less_equal)):
+            if condition.get(bound) is not None:
+                mask &= compare(values, float(condition[bound]))
+        return mask
+
+    # Aggregations
+
+    def _aggregations(self, aggs, rows):
+        """Evaluate sibling aggregations over the row positions in rows"""
+        results = {}
+        for name, spec in aggs.items():
+            kinds = [key for key in spec if key not in ("aggs", "aggregations", "meta")]
+            if len(kinds) != 1:
+                raise UnsupportedQuery(f"Aggregation {name} must have exactly one type")
+            kind = kinds[0]
+            if kind in BUCKET_PIPELINES:
+                continue  # applied by the parent to its buckets
+            sub_aggs = spec.get("aggs", spec.get("aggregations", {}))
+            handler = getattr(self, f"_agg_{kind}", None)
+            if handler is None:
+                raise UnsupportedQuery(f"Unsupported aggregation: {kind}")
+            if kind in METRICS:
+                results[name] = handler(spec[kind], rows)
+            else:
+                results[name] = handler(spec[kind], sub_aggs, rows)
+        return results
+
+    def _doc_count(self, rows):
+        """Number of documents behind rows, honouring _doc_count"""
+        if self.doc_counts is None:
+            return int(len(rows))
+        return int(self.doc_counts[rows].sum())
+
+    def _single_bucket(self, rows, sub_aggs):
+        return {"doc_count": self._doc_count(rows), **self._aggregations(sub_aggs, rows)}
+
+    def _values(self, spec, rows):
+        """Non-missing values of spec["field"] among rows, with spec["missing"] filled in"""
+        column = self._column(spec["field"])
+        if column is None:
+            if "missing" in spec:
+                return np.full(len(rows), spec["missing"], dtype=object)
+            return np.array([])
+        values, missing = column
+        if "missing" in spec:
+            selected = values[rows].copy()
+            selected[missing[rows]] = spec["missing"]
+            return selected
+        return values[rows[~missing[rows]]]
+
+    def _agg_cardinality(self, spec, rows):
+        return {"value": int(pd.unique(self._values(spec, rows)).size)}
+
+    def _agg_value_count(self, spec, rows):
+        return {"value": int(len(self._values(spec, rows)))}
+
+    def _agg_stats(self, spec, rows):
+        values = self._values(spec, rows).astype(float)
+        if not len(values):
+            return {"count": 0, "min": None, "max": None, "avg": None, "sum": 0.0}
+        return {"count": int(len(values)), "min": float(values.min()),
+                "max": float(values.max()), "avg": float(values.mean()),
+                "sum": float(values.sum())}
+
+    def _agg_avg(self, spec, rows):
+        return {"value": self._agg_stats(spec, rows)["avg"]}
+
+    def _agg_sum(self, spec, rows):
+        return {"value": self._agg_stats(spec, rows)["sum"]}
+
+    def _agg_min(self, spec, rows):
+        return {"value": self._agg_stats(spec, rows)["min"]}
+
+    def _agg_max(self, spec, rows):
+        return {"value": self._agg_stats(spec, rows)["max"]}
+
+    def _agg_weighted_avg(self, spec, rows):
+        value_column = self._column(spec["value"]["field"])
+        weight_column = self._column(spec["weight"]["field"])
+        if value_column is None or weight_column is None:
+            return {"value": None}
+        selected = rows[~(value_column[1][rows] | weight_column[1][rows])]
+        weights = weight_column[0][selected].astype(float)
+        if not weights.sum():
+            return {"value": None}
+        values = value_column[0][selected].astype(float)
+        return {"value": float((values * weights).sum() / weights.sum())}
+
+    def _agg_missing(self, spec, sub_aggs, rows):
+        column = self._column(spec["field"])
+        missing_rows = rows if column is None else rows[column[1][rows]]
+        return self._single_bucket(missing_rows, sub_aggs)
+
+    def _agg_filter(self, spec, sub_aggs, rows):
+        return self._single_bucket(rows[self._query(spec)[rows]], sub_aggs)
+
+    def _agg_filters(self, spec, sub_aggs, rows):
+        filters = spec["filters"]
+        if isinstance(filters, dict):
+            return {"buckets": {key: self._single_bucket(rows[self._query(query)[rows]], sub_aggs)
+                                for key, query in filters.items()}}
+        buckets = [self._single_bucket(rows[self._query(query)[rows]], sub_aggs)
+                   for query in filters]
+        return {"buckets": self._pipelines(buckets, sub_aggs)}
+
+    def _grouped_rows(self, spec, rows):
+        """Return (keys, row positions per key) for the values of spec["field"] in rows"""
+        column = self._column(spec["field"])
+        if column is None:
+            if "missing" not in spec:
+                return [], []
+            return [spec["missing"]], [rows]
+        values, missing = column
+        selected = rows if "missing" in spec else rows[~missing[rows]]
+        keys = values[selected]
+        if "missing" in spec:
+            keys = keys.copy()
+            keys[missing[selected]] = spec["missing"]
+        codes, uniques = pd.factorize(keys)
+        order = np.argsort(codes, kind="stable")
+        groups = np.split(selected[order], np.cumsum(np.bincount(codes, minlength=len(uniques)))[:-1])
+        return [_native(key) for key in uniques], groups
+
+    def _agg_terms(self, spec, sub_aggs, rows):
+        keys, groups = self._grouped_rows(spec, rows)
+        counts = [self._doc_count(group) for group in groups]
+        total = sum(counts)
+        min_doc_count = spec.get("min_doc_count", 1)
+        include, exclude = spec.get("include"), spec.get("exclude")
+        candidates = []
+        for key, group, count in zip(keys, groups, counts):
+            if count < min_doc_count or not self._included(key, include, exclude):
+                continue
+            candidates.append(({"key": key, "doc_count": count}, group))
+
+        criteria = _order_criteria(spec.get("order", {"_count": "desc"}))
+        if criteria[0][0] != "_key":
+            criteria.append(("_key", "asc"))  # Elasticsearch breaks ties on the key
+        by_metric = any(path not in ("_count", "_key") for path, _ in criteria)
+        if by_metric:
+            for bucket, group in candidates:
+                bucket.update(self._aggregations(sub_aggs, group))
+        buckets = _sort_buckets([bucket for bucket, _ in candidates], criteria)
+        buckets = buckets[:spec.get("size", 10)]
+        if not by_metric:
+            groups_by_key = {bucket["key"]: group for bucket, group in candidates}
+            for bucket in buckets:
+                bucket.update(self._aggregations(sub_aggs, groups_by_key[bucket["key"]]))
+        returned = sum(bucket["doc_count"] for bucket in buckets)
+        return {"doc_count_error_upper_bound": 0, "sum_other_doc_count": total - returned,
+                "buckets": self._pipelines(buckets, sub_aggs)}
+
+    def _included(self, key, include, exclude):
+        def matches(pattern):
+            if isinstance(pattern, list):
+                return key in pattern
+            return re.fullmatch(pattern, str(key)) is not None
+
+        if include is not None and not matches(include):
+            return False
+        return exclude is None or not matches(exclude)
+
+    def _agg_histogram(self, spec, sub_aggs, rows):
+        interval = float(spec["interval"])
+        offset = float(spec.get("offset", 0))
+        column = self._column(spec["field"])
+        if column is None:
+            return {"buckets": []}
+        values, missing = column
+        selected = rows[~missing[rows]]
+
+        def bucket_key(value):
+            return np.floor((value - offset) / interval) * interval + offset
+
+        keys = bucket_key(values[selected].astype(float))
+        min_doc_count = spec.get("min_doc_count", 0)
+        all_keys = np.unique(keys)
+        if min_doc_count == 0:
+            # Empty buckets fill the gaps, out to extended_bounds if given
+            bounds = spec.get("extended_bounds", {})
+            ends = list(all_keys[[0, -1]]) if len(all_keys) else []
+            ends += [bucket_key(float(bounds[end])) for end in ("min", "max") if end in bounds]
+            if ends:
+                low, high = min(ends), max(ends)
+                all_keys = low + interval * np.arange(int(round((high - low) / interval)) + 1)
+        buckets = []
+        for key in all_keys:
+            group = selected[keys == key]
+            if self._doc_count(group) < min_doc_count:
+                continue
+            buckets.append({"key": float(key), **self._single_bucket(group, sub_aggs)})
+        if "order" in spec:
+            _sort_buckets(buckets, _order_criteria(spec["order"]))
+        return {"buckets": self._pipelines(buckets, sub_aggs)}
+
+    def _agg_range(self, spec, sub_aggs, rows):
+        column = self._column(spec["field"])
+        if column is None:
+            selected, numbers = rows[:0], np.array([])
+        else:
+            values, missing = column
+            selected = rows[~missing[rows]]
+            numbers = values[selected].astype(float)
+        buckets = []
+        for item in spec["ranges"]:
+            low, high = item.get("from"), item.get("to")
+            mask = np.ones(len(selected), dtype=bool)
+            if low is not None:
+                mask &= numbers >= low
+            if high is not None:
+                mask &= numbers < high
+            key = item.get("key", f"{'*' if low is None else float(low)}-"
+                                  f"{'*' if high is None else float(high)}")
+            bucket = {"key": key}
+            if low is not None:
+                bucket["from"] = float(low)
+            if high is not None:
+                bucket["to"] = float(high)
+            bucket.update(self._single_bucket(selected[mask], sub_aggs))
+            buckets.append(bucket)
+        if spec.get("keyed"):
+            return {"buckets": {bucket.pop("key"): bucket for bucket in buckets}}
+        return {"buckets": self._pipelines(buckets, sub_aggs)}
+
+    # Pipelines
+
+    def _pipelines(self, buckets, sub_aggs):
+        """Apply bucket_script, then bucket_selector, then bucket_sort sub-aggregations"""
+        pipelines = [(name, kind, spec[kind]) for name, spec in sub_aggs.items()
+                     for kind in BUCKET_PIPELINES if kind in spec]
+        for kind in BUCKET_PIPELINES:
+            for name, _, spec in (p for p in pipelines if p[1] == kind):
+                buckets = getattr(self, f"_{kind}")(name, spec, buckets)
+        return buckets
+
+    def _bucket_variables(self, spec, bucket):
+        paths = spec.get("buckets_path", {})
+        if isinstance(paths, str):
+            paths = {"_value": paths}
+        return {var: resolve_bucket_path(bucket, path) for var, path in paths.items()}
+
+    def _bucket_script(self, name, spec, buckets):
+        for bucket in buckets:
+            variables = self._bucket_variables(spec, bucket)
+            if any(value is None for value in variables.values()):
+                continue  # gap_policy skip
+            bucket[name] = {"value": _float(evaluate_script(spec["script"], variables))}
+        return buckets
+
+    def _bucket_selector(self, name, spec, buckets):
+        kept = []
+        for bucket in buckets:
+            variables = self._bucket_variables(spec, bucket)
+            if any(value is None for value in variables.values()):
+                continue
+            if evaluate_script(spec["script"], variables):
+                kept.append(bucket)
+        return kept
+
+    def _bucket_sort(self, name, spec, buckets):
+        criteria = []
+        for item in spec.get("sort", []):
+            if isinstance(item, str):
+                criteria.append((item, "asc"))
+            else:
+                for path, direction in item.items():
+                    if isinstance(direction, dict):
+                        direction = direction.get("order", "asc")
+                    criteria.append((path, direction))
+        if criteria:
+            buckets = _sort_buckets(list(buckets), criteria)
+        offset = spec.get("from", 0)
+        size = spec.get("size")
+        return buckets[offset:offset + size if size is not None else None]
@@ -0,0 +1,200 @@
+"""
+Client-side result cache for the exam aggregation queries
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+DEFAULT_MAX_ENTRIES = 256
+# How often the index generation is re-read; a reload is noticed within this delay
+GENERATION_CHECK_INTERVAL = 5.0
+# File of cache_dir recording the index generations its entries were cached under
+GENERATIONS_FILE = "generations.json"
+
+
+def cache_key(index, body, generation, params=None):
+    """Canonical hash of a search: same query, index and data generation, same key"""
+    canonical = json.dumps(
+        {"index": index, "body": body, "params": params or {}, "generation": generation},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """LRU + TTL cache of search responses, invalidated when the data changes
+
+    Results are keyed by the query body and the index generation that
+    ETLService writes in the index _meta (plus the concrete index name, so an
+    alias swap counts as a change). The generation is looked up at most every
+    generation_check_interval seconds, which keeps hits in the microsecond
+    range. With cache_dir set, entries are also stored as JSON files so other
+    processes and later runs can reuse them; the directory is emptied when an
+    index generation differs from the one recorded there.
+
+    Cached responses are shared between callers and must not be modified.
+    """
+
+    def __init__(self, es, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, cache_dir=None,
+                 generation_check_interval=GENERATION_CHECK_INTERVAL):
+        self.es = es
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.generation_check_interval = generation_check_interval
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def generation(self, index):
+        """Return the data generation of index, re-reading it when the check interval expired"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._generations.get(index)
+        if cached and now - cached[1] < self.generation_check_interval:
+            return cached[0]
+
+        mappings = self.es.indices.get_mapping(index=index, filter_path="*.mappings._meta")
+        generation = ",".join(
+            f"{name}:{mapping.get('mappings', {}).get('_meta', {}).get('generation', 0)}"
+            for name, mapping in sorted(mappings.items())
+        )
+        changed = cached is not None and cached[0] != generation
+        with self._lock:
+            if changed:
+                logger.info(f"Index {index} generation changed, dropping cached results")
+                self._entries.clear()
+            self._generations[index] = (generation, now)
+        if self.cache_dir and (cached is None or changed):
+            self._prune_disk(index, generation)
+        return generation
+
+    def key(self, index, body, params=None):
+        """Return the cache key of a search against the current data generation"""
+        return cache_key(index, body, self.generation(index), params)
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self._entries.pop(key, None)
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry:
+                self._store(key, entry)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def put(self, key, response):
+        """Store a response under key for ttl seconds"""
+        entry = (time.time() + self.ttl, response)
+        with self._lock:
+            self._store(key, entry)
+        self._write_disk(key, entry)
+
+    def search(self, index, body, **params):
+        """es.search with caching; params are passed through and part of the key"""
+        key = self.key(index, body, params)
+        response = self.get(key)
+        if response is None:
+            response = self.es.search(index=index, body=body, **params)
+            self.put(key, response)
+        return response
+
+    def invalidate(self):
+        """Drop every cached result, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+        if self.cache_dir:
+            self._clear_disk()
+
+    def _store(self, key, entry):
+        """Insert an entry and evict the least recently used ones; caller holds the lock"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _clear_disk(self):
+        """Remove every entry file, the generations file included"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _prune_disk(self, index, generation):
+        """Empty cache_dir if its entries were cached under another generation of index
+
+        Entry keys include the generation, so entries of an older one are
+        never read again and would otherwise stay on disk for good.
+        """
+        path = os.path.join(self.cache_dir, GENERATIONS_FILE)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                generations = json.load(f)
+        except (OSError, ValueError):
+            generations = {}
+        if generations.get(index) == generation:
+            return
+        if index in generations or not generations:
+            # Without a record, the entries there may be of any generation
+            if index in generations:
+                logger.info(f"Index {index} generation changed, pruning {self.cache_dir}")
+            self._clear_disk()
+            generations = {}
+        generations[index] = generation
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(generations, f)
+        os.replace(tmp_path, path)
+
+    def _read_disk(self, key):
+        """Return (expires_at, response) from the disk backend, or None"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry["expires_at"] <= time.time():
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            return None
+        return entry["expires_at"], entry["response"]
+
+    def _write_disk(self, key, entry):
+        """Persist an entry atomically so concurrent readers never see half a file"""
+        if not self.cache_dir:
+            return
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"expires_at": entry[0], "response": entry[1]}, f)
+        os.replace(tmp_path, self._path(key))
@@ -0,0 +1,94 @@
+"""
+Run the exam queries in a single _msearch round trip
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX = "eval_new"
+
+# Names of the entries of exam_queries.query_list, in order
+QUERY_NAMES = ['q2_1', 'q2_2', 'q2_3', 'q2_4', 'q2_5', 'q2_6',
+               'q3', 'q4_1', 'q4_2', 'q4_3', 'q4_4',
+               'q5_1', 'q5_2', 'q5_3', 'q5_4']
+
+
+class QueryError(Exception):
+    """Raised when reading the result of a query that Elasticsearch rejected"""
+
+    def __init__(self, name, error):
+        self.name = name
+        self.error = error
+        reason = error.get("reason", error) if isinstance(error, dict) else error
+        super().__init__(f"{name}: {reason}")
+
+
+class MSearchResults(dict):
+    """Responses by query name; reading a failed query raises its QueryError"""
+
+    def __getitem__(self, name):
+        response = super().__getitem__(name)
+        if "error" in response:
+            raise QueryError(name, response["error"])
+        return response
+
+    def errors(self):
+        """Return {name: error} for the queries that failed"""
+        return {name: response["error"] for name, response in self.items()
+                if "error" in response}
+
+
+def named_queries(queries=None):
+    """Return {name: body} for a query_list (by default the exam one)"""
+    if queries is None:
+        from src.queries.exam_queries import query_list
+        queries = query_list
+    if isinstance(queries, dict):
+        return dict(queries)
+    return {QUERY_NAMES[i] if i < len(QUERY_NAMES) else f"query_{i}": query
+            for i, query in enumerate(queries)}
+
+
+def run_msearch(es, queries=None, index=DEFAULT_INDEX, max_concurrent_searches=None,
+                cache=None, timeout=None):
+    """Execute queries in one _msearch request and map each response back to its name
+
+    queries is a query_list, a {name: body} dict or None for the exam queries.
+    A query that fails only fails its own entry: its response is
+    {"error": ..., "status": ...} and reading it from the result raises
+    QueryError. With a QueryCache, cached responses are reused and only the
+    misses are sent. timeout (e.g. "30s") bounds each search, as the timeout
+    parameter of a single search does.
+    """
+    queries = named_queries(queries)
+    results = MSearchResults()
+    keys = {}
+    pending = []
+    for name, body in queries.items():
+        if cache is not None:
+            keys[name] = cache.key(index, body)
+            cached = cache.get(keys[name])
+            if cached is not None:
+                results[name] = cached
+                continue
+        pending.append(name)
+
+    if pending:
+        searches = []
+        for name in pending:
+            searches.append({"index": index})
+            searches.append(queries[name] if timeout is None
+                            else {**queries[name], "timeout": timeout})
+        params = {}
+        if max_concurrent_searches:
+            params["max_concurrent_searches"] = max_concurrent_searches
+        response = es.msearch(body=searches, **params)
+        for name, result in zip(pending, response["responses"]):
+            results[name] = result
+            if "error" in result:
+                logger.warning(f"Query {name} failed: {result['error']}")
+            elif cache is not None:
+                cache.put(keys[name], result)
+
+    # Keep the caller's order whatever was served from cache
+    return MSearchResults((name, dict.__getitem__(results, name)) for name in queries)
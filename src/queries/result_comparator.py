@@ -0,0 +1,189 @@
+"""
+Compare aggregation responses with expected results, path by path
+
+Both sides are flattened into {path: value}: a bucket list contributes one
+"name#i" entry per position holding the bucket key, and its buckets' values
+under "name[key]", so nested buckets are aligned on their keys, not on their
+positions. Numeric values are then checked against per-path tolerances in a
+single NumPy pass and every mismatch is reported:
+
+    assert_matches(expected["4-4"], result["aggregations"], {
+        "age_histogram[*].top_class_names": Tolerance(ordered=False),
+        "*doc_count": Tolerance(rel=0.1),
+    })
+
+Only paths present in the expected side are checked; a bucket list may hold
+more buckets than expected (size above the expected top-N), never fewer.
+"""
+import re
+from collections import namedtuple
+
+import numpy as np
+
+# rel/abs: allowed numeric difference, the larger of rel * |expected| and abs.
+# ordered=False lets buckets of a list come in any order. overlap on a bucket
+# list only checks that this share of expected keys is present. ignore skips
+# the path (and everything under a bucket list).
+Tolerance = namedtuple('Tolerance', ['rel', 'abs', 'ordered', 'overlap', 'ignore'],
+                       defaults=(0.0, 0.0, True, None, False))
+EXACT = Tolerance()
+IGNORE = Tolerance(ignore=True)
+
+# Mismatches listed by Comparison.explain before eliding the rest
+EXPLAIN_LIMIT = 20
+
+
+def _key(value):
+    """Normalize a bucket key so 5, 5.0 and "5" from histograms and terms agree"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value) if float(value).is_integer() else float(value)
+    return value
+
+
+def _walk(node, path, lists):
+    """Yield (path, enclosing bucket list paths, value) for every leaf of node"""
+    if isinstance(node, dict):
+        buckets = node.get("buckets")
+        if isinstance(buckets, list):
+            inner = lists + (path,)
+            for position, bucket in enumerate(buckets):
+                key = _key(bucket.get("key"))
+                yield f"{path}#{position}", inner, key
+                for name, value in bucket.items():
+                    if name not in ("key", "key_as_string"):
+                        yield from _walk(value, f"{path}[{key}].{name}", inner)
+            node = {name: value for name, value in node.items() if name != "buckets"}
+        for name, value in node.items():
+            yield from _walk(value, f"{path}.{name}" if path else name, lists)
+    elif isinstance(node, list):
+        for position, value in enumerate(node):
+            yield from _walk(value, f"{path}.{position}", lists)
+    else:
+        yield path, lists, node
+
+
+def flatten(response):
+    """Return {path: value} for an aggregation response (see module docstring)"""
+    return {path: value for path, _, value in _walk(response, "", ())}
+
+
+def _compile(rules):
+    """Turn {glob pattern: Tolerance} into [(regex, Tolerance)], * matching anything"""
+    return [(re.compile(".*".join(re.escape(part) for part in pattern.split("*"))), tolerance)
+            for pattern, tolerance in (rules or {}).items()]
+
+
+def _rule(path, rules):
+    for pattern, tolerance in rules:
+        if pattern.fullmatch(path):
+            return tolerance
+    return EXACT
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Comparison:
+    """Outcome of compare: ok, number of checked paths and the mismatches"""
+
+    def __init__(self, checked, diffs):
+        self.checked = checked
+        self.diffs = diffs
+
+    @property
+    def ok(self):
+        return not self.diffs
+
+    def explain(self, limit=EXPLAIN_LIMIT):
+        """Human-readable list of mismatches, one per line"""
+        if self.ok:
+            return f"{self.checked} paths match"
+        lines = [f"{len(self.diffs)} of {self.checked} paths differ:"]
+        for diff in self.diffs[:limit]:
+            line = f"  {diff['path']}: {diff['reason']}, expected {diff['expected']!r}"
+            if diff["actual"] is not None:
+                line += f", got {diff['actual']!r}"
+            if diff.get("allowed"):
+                line += f" (allowed ±{diff['allowed']:g})"
+            lines.append(line)
+        if len(self.diffs) > limit:
+            lines.append(f"  ... {len(self.diffs) - limit} more")
+        return "\n".join(lines)
+
+
+def compare(expected, actual, rules=None):
+    """Compare an actual aggregation response with the expected one
+
+    rules maps path patterns to Tolerance, first match wins; paths matching
+    none must be equal. Bucket list rules (ordered, overlap, ignore) are
+    looked up with the path of the list itself, e.g. "by_division".
+    """
+    rules = _compile(rules)
+    actual_flat = {}
+    actual_keys = {}
+    for path, lists, value in _walk(actual, "", ()):
+        actual_flat[path] = value
+        if lists and path.startswith(lists[-1] + "#"):
+            actual_keys.setdefault(lists[-1], set()).add(value)
+
+    diffs = []
+    numeric = []
+    overlaps = {}
+    checked = 0
+    for path, lists, value in _walk(expected, "", ()):
+        list_rules = [(list_path, _rule(list_path, rules)) for list_path in lists]
+        if any(rule.ignore or rule.overlap is not None for _, rule in list_rules):
+            for list_path, rule in list_rules:
+                if rule.overlap is not None and path.startswith(list_path + "#"):
+                    overlaps.setdefault(list_path, (rule.overlap, set()))[1].add(value)
+            continue
+        rule = _rule(path, rules)
+        if rule.ignore:
+            continue
+        checked += 1
+        if lists and path.startswith(lists[-1] + "#"):
+            # Bucket key at a position of the list
+            list_path, list_rule = list_rules[-1]
+            if list_rule.ordered:
+                if actual_flat.get(path) != value:
+                    reason = "missing bucket" if path not in actual_flat else "wrong key"
+                    diffs.append({"path": path, "expected": value,
+                                  "actual": actual_flat.get(path), "reason": reason})
+            elif value not in actual_keys.get(list_path, ()):
+                diffs.append({"path": path, "expected": value, "actual": None,
+                              "reason": "missing bucket"})
+        elif path not in actual_flat:
+            diffs.append({"path": path, "expected": value, "actual": None, "reason": "missing"})
+        elif _is_number(value) and _is_number(actual_flat[path]):
+            numeric.append((path, value, actual_flat[path], rule.rel, rule.abs))
+        elif actual_flat[path] != value:
+            diffs.append({"path": path, "expected": value, "actual": actual_flat[path],
+                          "reason": "not equal"})
+
+    if numeric:
+        paths, wanted, got, rel, absolute = zip(*numeric)
+        wanted, got = np.array(wanted, dtype=float), np.array(got, dtype=float)
+        allowed = np.maximum(np.array(rel) * np.abs(wanted), np.array(absolute))
+        failed = np.flatnonzero(~(np.abs(got - wanted) <= allowed))
+        for position in failed:
+            diffs.append({"path": paths[position], "expected": numeric[position][1],
+                          "actual": numeric[position][2], "allowed": float(allowed[position]),
+                          "reason": "out of tolerance"})
+
+    for list_path, (share, keys) in overlaps.items():
+        checked += 1
+        found = keys & actual_keys.get(list_path, set())
+        if len(found) < share * len(keys):
+            diffs.append({"path": list_path, "expected": sorted(keys, key=str),
+                          "actual": sorted(found, key=str),
+                          "reason": f"only {len(found)} of {len(keys)} keys present, "
+                                    f"{share:.0%} required"})
+    return Comparison(checked, diffs)
+
+
+def assert_matches(expected, actual, rules=None):
+    """Raise AssertionError with the explained mismatches unless actual matches"""
+    comparison = compare(expected, actual, rules)
+    assert comparison.ok, comparison.explain()
+    return comparison
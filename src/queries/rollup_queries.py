@@ -0,0 +1,96 @@
+"""
+Exam aggregations answered from the rollup index instead of every review
+
+ETLService.run_etl(rollup=True) writes one summary document per product,
+class and division/department pair to eval_new_rollup. Each summary carries
+_doc_count, so terms buckets report review counts as on the review index.
+Run them with run_msearch(es, rollup_queries, index=ROLLUP_INDEX).
+"""
+
+ROLLUP_INDEX = "eval_new_rollup"
+
+# Products with fewer reviews are too noisy to rank
+MIN_PRODUCT_REVIEWS = 3
+
+
+def _kind(kind):
+    return {"term": {"kind": kind}}
+
+
+# 2-5. Départements par division
+rollup_q2_5 = {
+    "size": 0,
+    "query": _kind("department"),
+    "aggs": {
+        "by_division": {
+            "terms": {"field": "Division Name", "size": 10},
+            "aggs": {
+                "by_department": {"terms": {"field": "Department Name", "size": 10}}
+            }
+        }
+    }
+}
+
+# 4-3. Scores par classe de produit
+rollup_q4_3 = {
+    "size": 0,
+    "query": _kind("class"),
+    "aggs": {
+        "class_scores": {
+            "terms": {"field": "Class Name", "size": 30, "order": {"avg_score": "desc"}},
+            "aggs": {
+                # Weighted by review count, so it stays exact if summaries are ever split
+                "avg_score": {
+                    "weighted_avg": {
+                        "value": {"field": "avg_rating"},
+                        "weight": {"field": "review_count"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+
+def _product_ranking(order):
+    """Products ranked by average rating then positive feedback, in order"""
+    return {
+        "size": 0,
+        "query": {
+            "bool": {
+                "filter": [
+                    _kind("product"),
+                    {"range": {"review_count": {"gte": MIN_PRODUCT_REVIEWS}}}
+                ]
+            }
+        },
+        "aggs": {
+            "by_product": {
+                "terms": {
+                    "field": "Clothing ID",
+                    "size": 10,
+                    "order": [{"avg_rating": order}, {"positive_feedback": "desc"}]
+                },
+                "aggs": {
+                    "avg_rating": {"max": {"field": "avg_rating"}},
+                    "review_count": {"sum": {"field": "review_count"}},
+                    "positive_feedback": {"sum": {"field": "positive_feedback"}}
+                }
+            }
+        }
+    }
+
+
+# 5-3. Meilleurs produits à garder
+rollup_q5_3 = _product_ranking("desc")
+
+# 5-4. Produits à éviter
+rollup_q5_4 = _product_ranking("asc")
+
+# Same names as the exam queries they replace, for run_msearch
+rollup_queries = {
+    "q2_5": rollup_q2_5,
+    "q4_3": rollup_q4_3,
+    "q5_3": rollup_q5_3,
+    "q5_4": rollup_q5_4,
+}
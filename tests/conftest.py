@@ -1,18 +1,10 @@
 import pytest
-import os
 import json
-import time
-from src.etl.etl_service import ETLService
+from src.queries.exam_queries import query_list
+from src.queries.query_runner import run_msearch
 
-@pytest.fixture(scope="session")
-def etl_service():
-    """Create ETL service instance"""
-    return ETLService(es_host=os.environ.get('ELASTICSEARCH_HOST', 'elasticsearch'))
-
-@pytest.fixture(scope="session")
-def es_client(etl_service):
-    """Get Elasticsearch client from ETL service"""
-    return etl_service.es
+# etl_service, setup_data and es_client are shared with src/integration_tests
+# through the root conftest.py
 
 @pytest.fixture(scope="session")
 def load_expected_results():
@@ -20,13 +12,7 @@ def load_expected_results():
     with open('tests/expected_results.json', 'r') as f:
         return json.load(f)
 
-@pytest.fixture(scope="session", autouse=True)
-def setup_data(etl_service):
-    """Prepare Elasticsearch with proper data and mapping"""
-    try:
-        etl_service.run_etl("/app/data/Womens_Clothing.csv")
-        # Wait for Elasticsearch to refresh
-        time.sleep(2)
-        return True
-    except Exception as e:
-        raise Exception(f"ETL process failed: {str(e)}")
\ No newline at end of file
+@pytest.fixture(scope="session")
+def exam_results(es_client, setup_data):
+    """Run all exam queries in one _msearch; a failing query only fails its own test"""
+    return run_msearch(es_client, query_list, index="eval_new")